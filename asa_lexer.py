@@ -1,7 +1,20 @@
+import re
+
 from pygments.lexer import RegexLexer, bygroups, words
 from pygments.token import *
+from pygments.token import _TokenType
+from pygments.util import get_bool_opt
 
 class AsaLexer(RegexLexer):
+    """Lexer for Asa.
+
+    By default tokens are produced by a combined-pattern engine: the rules
+    of each state are compiled into one alternation, so finding the rule
+    that matches costs a single regex call instead of one per rule. Pass
+    fast=False to use Pygments' rule-by-rule RegexLexer engine instead;
+    both produce the same tokens.
+    """
+
     name = 'Asa'
     aliases = ['asa']
     filenames = ['*.asa']
@@ -9,6 +22,9 @@ class AsaLexer(RegexLexer):
 
     tokens = {
         'root': [
+            # Whitespace (no other rule can match at whitespace, so checking it first is safe)
+            (r'\s+', Text),
+
             # Single-line comments
             (r'//.*?$', Comment.Single),
 
@@ -67,7 +83,9 @@ class AsaLexer(RegexLexer):
              bygroups(Name.Function, Text, Punctuation)),
 
             # Type annotations: name : type or name : *type or name : const/ref/exact type
-            (r'([a-zA-Z_]\w*)(\s*)(:)(\s*)(\*?)(\s*)((?:const|ref|exact)\s+)?(\*?)(\s*)([a-zA-Z_]\w*)',
+            # (the whitespace after each '*' is only tried when the '*' is there; three
+            # adjacent \s* groups made a failed match cubic in the length of the whitespace)
+            (r'([a-zA-Z_]\w*)(\s*)(:)(\s*)(?:(\*)(\s*))?((?:const|ref|exact)\s+)?(?:(\*)(\s*))?([a-zA-Z_]\w*)',
              bygroups(Name.Variable, Text, Punctuation, Text, Operator, Text,
                      Keyword.Declaration, Operator, Text, Keyword.Type)),
 
@@ -115,30 +133,46 @@ class AsaLexer(RegexLexer):
             # Numbers - integer
             (r'\d[\d_]*', Number.Integer),
 
-            # Strings
-            (r'b?"([^"\\]|\\.)*"', String),
-            (r'br#+".*?"#+', String),  # Raw strings
-
-            # Characters
-            (r"b?'([^'\\]|\\.)+'", String.Char),
+            # Strings, raw strings and characters are lexed in their own states: as
+            # single rules, an unterminated one was rescanned from every quote after it
+            (r'b?"', String, 'string'),
+            (r'br#+"', String, 'raw_string'),
+            (r"b?'(?=[^'])", String.Char, 'char'),
 
             # Punctuation
             (r'[{}()\[\];,]', Punctuation),
 
             # Identifiers
             (r'[a-zA-Z_]\w*', Name),
-
-            # Whitespace
-            (r'\s+', Text),
         ],
 
         'comment': [
-            (r'[^*/]', Comment.Multiline),
+            # Runs of comment text as one token, not one per character
+            (r'[^*/]+', Comment.Multiline),
             (r'/\*', Comment.Multiline, '#push'),
             (r'\*/', Comment.Multiline, '#pop'),
             (r'[*/]', Comment.Multiline),
         ],
 
+        'string': [
+            (r'[^"\\]+', String),
+            (r'\\.', String),
+            (r'"', String, '#pop'),
+        ],
+
+        'raw_string': [
+            # Ends at the end of the line if unterminated
+            (r'[^"\n]+', String),
+            (r'"#+', String, '#pop'),
+            (r'"', String),
+        ],
+
+        'char': [
+            (r"[^'\\]+", String.Char),
+            (r'\\.', String.Char),
+            (r"'", String.Char, '#pop'),
+        ],
+
         'import_path': [
             # Module name component
             (r'[A-Za-z_][A-Za-z0-9_]*', Name.Namespace),
@@ -152,3 +186,81 @@ class AsaLexer(RegexLexer):
             (r'\s+', Text),
         ]
     }
+
+    def __init__(self, **options):
+        self.fast = get_bool_opt(options, 'fast', True)
+        super().__init__(**options)
+
+    # Combined pattern per state, built on first use
+    _master_patterns = None
+
+    @classmethod
+    def _get_master_patterns(cls, tokendefs):
+        # Look in this class only, so subclasses with other rules compile their own
+        if cls.__dict__.get('_master_patterns') is None:
+            patterns = {}
+            for state, statetokens in tokendefs.items():
+                # Alternation tries rules left to right, like RegexLexer does;
+                # group _<i> tells which rule matched
+                parts = [f"(?P<_{i}>{rexmatch.__self__.pattern})" for i, (rexmatch, _, _) in enumerate(statetokens)]
+                patterns[state] = re.compile("|".join(parts), statetokens[0][0].__self__.flags)
+            cls._master_patterns = patterns
+        return cls.__dict__['_master_patterns']
+
+    def get_tokens_unprocessed(self, text, stack=('root',)):
+        if not self.fast:
+            yield from RegexLexer.get_tokens_unprocessed(self, text, stack)
+            return
+
+        tokendefs = self._tokens
+        masters = self._get_master_patterns(tokendefs)
+        pos = 0
+        statestack = list(stack)
+        statetokens = tokendefs[statestack[-1]]
+        master = masters[statestack[-1]]
+        while 1:
+            m = master.match(text, pos)
+            if m:
+                rexmatch, action, new_state = statetokens[int(m.lastgroup[1:])]
+                if action is not None:
+                    if type(action) is _TokenType:
+                        yield pos, action, m.group()
+                    else:
+                        # Callbacks (bygroups) index groups from 1, so rerun just that rule
+                        m = rexmatch(text, pos)
+                        yield from action(self, m)
+                pos = m.end()
+                if new_state is not None:
+                    # State transition, as in RegexLexer.get_tokens_unprocessed
+                    if isinstance(new_state, tuple):
+                        for state in new_state:
+                            if state == '#pop':
+                                if len(statestack) > 1:
+                                    statestack.pop()
+                            elif state == '#push':
+                                statestack.append(statestack[-1])
+                            else:
+                                statestack.append(state)
+                    elif isinstance(new_state, int):
+                        if abs(new_state) >= len(statestack):
+                            del statestack[1:]
+                        else:
+                            del statestack[new_state:]
+                    elif new_state == '#push':
+                        statestack.append(statestack[-1])
+                    statetokens = tokendefs[statestack[-1]]
+                    master = masters[statestack[-1]]
+            else:
+                # No rule matched
+                if pos >= len(text):
+                    break
+                if text[pos] == '\n':
+                    # at EOL, reset state to "root"
+                    statestack = ['root']
+                    statetokens = tokendefs['root']
+                    master = masters['root']
+                    yield pos, Whitespace, '\n'
+                    pos += 1
+                    continue
+                yield pos, Error, text[pos]
+                pos += 1
@@ -0,0 +1,225 @@
+"""
+Post-build asset stage: a deployable copy of the site with fingerprinted,
+precompressed assets.
+
+The generated pages link to assets by fixed names (for example
+../samuelhp_files/styles.css), so browsers and CDNs have to revalidate
+them on every visit. build_assets() copies the site (PUBLISHED_FILES and
+everything in PUBLISHED_DIRS) into out_dir and:
+
+- gives every local file that a page or stylesheet references literally
+  (stylesheets, fonts, images, icons) a copy named after its content,
+  e.g. samuelhp_files/styles.3f2a1b9c04.css, and rewrites the references
+  in the HTML and CSS to it. Those copies never change, so the host can
+  serve them with a long cache lifetime. The original names are kept as
+  well, for files that scripts load by building the path (the Astronaut3D
+  frames) and for the web manifest's icons.
+- writes .gz siblings, and .br siblings when the brotli package is
+  installed, for text files (HTML, CSS, SVG, fonts, ...) on hosts that
+  serve precompressed variants.
+
+Files are written through output_writer, so unchanged files are left
+alone, and compression runs in a thread pool. The hash each compressed
+variant was made from is kept in ASSET_MANIFEST_PATH; a file is only
+recompressed when its content has changed or a variant is missing.
+
+    python build.py assets [--root .] [--dist ./dist] [-j N]
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+
+import output_writer
+import profiling
+
+DIST_DIR = "./dist"
+ASSET_MANIFEST_PATH = "./.cache/assets.json"
+FINGERPRINT_LENGTH = 10
+
+# The published site: these files at the root, and everything in these directories.
+# Sources, tooling, tests and caches live elsewhere and are never copied.
+PUBLISHED_FILES = {"index.html", "portfolio.html", "placeholder.jpg", "CNAME", "site.webmanifest", "favicon.ico",
+                   "favicon-16x16.png", "favicon-32x32.png", "apple-touch-icon.png",
+                   "android-chrome-192x192.png", "android-chrome-512x512.png"}
+PUBLISHED_DIRS = {"b", "data", "samuelhp_files", "fonts", "images", "thumbs", "Astronaut3D"}
+# Left in published directories by tools (output_writer's temporary files, byte code)
+EXCLUDED_SUFFIXES = {".tmp", ".pyc"}
+
+COMPRESSIBLE_SUFFIXES = {".html", ".css", ".js", ".svg", ".json", ".webmanifest", ".txt", ".csv", ".xml",
+                         ".ttf", ".otf", ".ico"}
+# Smaller files gain less from compression than the extra request header costs
+MIN_COMPRESS_BYTES = 256
+
+# Group 3 is the reference. A quoted value runs to the matching quote, so it may hold the other one
+HTML_REF_RE = re.compile(r'''(\b(?:href|src)\s*=\s*)(["'])((?:(?!\2).)*)\2''', re.DOTALL)
+CSS_REF_RE = re.compile(r'''(url\(\s*)(["'])?((?(2)(?:(?!\2).)*|[^"')\s]*))(?(2)\2)(\s*\))''')
+EXTERNAL_REF_RE = re.compile(r'^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//|#)')
+
+
+def site_files(root, out_dir):
+    """Relative (posix) paths of every published file under root, sorted."""
+    skip = os.path.realpath(out_dir)
+    files = [name for name in PUBLISHED_FILES if os.path.isfile(os.path.join(root, name))]
+    for top in PUBLISHED_DIRS:
+        for directory, dirnames, filenames in os.walk(os.path.join(root, top)):
+            # Hidden directories (editor and tool state) are never part of the site
+            dirnames[:] = sorted(name for name in dirnames
+                                 if not name.startswith(".") and name != "__pycache__"
+                                 and os.path.realpath(os.path.join(directory, name)) != skip)
+            for name in filenames:
+                if name.startswith(".") or os.path.splitext(name)[1] in EXCLUDED_SUFFIXES:
+                    continue
+                files.append(os.path.relpath(os.path.join(directory, name), root).replace(os.sep, "/"))
+    return sorted(files)
+
+def resolve_reference(ref, page):
+    """Site-relative path that ref points to from the file page, or None for external references."""
+    if not ref or EXTERNAL_REF_RE.match(ref):
+        return None
+    path = re.split(r'[?#]', ref, 1)[0]
+    if path.startswith("/"):
+        path = path[1:]
+    else:
+        path = posixpath.join(posixpath.dirname(page), path)
+    return posixpath.normpath(path)
+
+def fingerprinted_name(path, data):
+    stem, suffix = posixpath.splitext(path)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:FINGERPRINT_LENGTH]}{suffix}"
+
+def rewrite_references(text, page, pattern, fingerprints):
+    """Point every reference in text to a fingerprinted file at its fingerprinted copy."""
+    def rewrite(match):
+        ref = match.group(3)
+        target = fingerprints.get(resolve_reference(ref, page))
+        if target is None:
+            return match.group(0)
+        # Swap only the file name, so the reference stays relative the way it was written
+        path_end = len(re.split(r'[?#]', ref, 1)[0])
+        directory = ref[:path_end].rsplit("/", 1)[0] + "/" if "/" in ref[:path_end] else ""
+        new_ref = directory + posixpath.basename(target) + ref[path_end:]
+        # Rebuilt from the groups, so an attribute name or url( that happens to contain ref is left alone
+        quote = match.group(2) or ""
+        end = match.group(4) if pattern.groups > 3 else ""
+        return match.group(1) + quote + new_ref + quote + end
+    return pattern.sub(rewrite, text)
+
+def referenced_files(text, page, pattern, files):
+    return {path for path in (resolve_reference(match.group(3), page) for match in pattern.finditer(text))
+            if path in files}
+
+
+def get_compressors():
+    """Map of file suffix to compression function, for the encodings available."""
+    compressors = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        print("\t ! brotli is not installed, skipping .br variants (pip install brotli)")
+        return compressors
+    compressors[".br"] = lambda data: brotli.compress(data, quality=11)
+    return compressors
+
+def load_asset_manifest(manifest_path=ASSET_MANIFEST_PATH):
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_asset_manifest(manifest, manifest_path=ASSET_MANIFEST_PATH):
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def plan_outputs(root, files):
+    """Return {output path: content} for the site, with fingerprinted copies and rewritten references.
+
+    Content is bytes for pages and stylesheets, which are rewritten, and
+    the source path for every other file, which is read when it is written.
+    """
+    def read(path):
+        with profiling.timed("io", f"read {path}"), open(os.path.join(root, path), 'rb') as f:
+            return f.read()
+
+    pages = {path: read(path).decode("utf-8") for path in files if path.endswith(".html")}
+    styles = {path: read(path).decode("utf-8") for path in files if path.endswith(".css")}
+    file_set = set(files)
+    referenced = set()
+    for path, text in pages.items():
+        referenced |= referenced_files(text, path, HTML_REF_RE, file_set)
+    for path, text in styles.items():
+        referenced |= referenced_files(text, path, CSS_REF_RE, file_set)
+
+    # Fingerprint what stylesheets point at first, since a stylesheet's name depends on its rewritten content
+    fingerprints = {}
+    for path in sorted(referenced - set(pages) - set(styles)):
+        fingerprints[path] = fingerprinted_name(path, read(path))
+    outputs = {}
+    for path, text in styles.items():
+        data = rewrite_references(text, path, CSS_REF_RE, fingerprints).encode("utf-8")
+        outputs[path] = data
+        if path in referenced:
+            fingerprints[path] = fingerprinted_name(path, data)
+            outputs[fingerprints[path]] = data
+    for path, text in pages.items():
+        outputs[path] = rewrite_references(text, path, HTML_REF_RE, fingerprints).encode("utf-8")
+    for path in files:
+        if path not in outputs:
+            outputs[path] = path
+            if path in fingerprints:
+                outputs[fingerprints[path]] = path
+    return outputs
+
+def write_output(root, out_dir, path, content, compressors, compressed):
+    """Write one output and its compressed variants. Returns the hash the variants were made from."""
+    data = content
+    if isinstance(content, str):
+        with profiling.timed("io", f"read {content}"), open(os.path.join(root, content), 'rb') as f:
+            data = f.read()
+    out_path = os.path.join(out_dir, *path.split("/"))
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    output_writer.write_bytes(out_path, data)
+    if posixpath.splitext(path)[1] not in COMPRESSIBLE_SUFFIXES or len(data) < MIN_COMPRESS_BYTES:
+        return None
+    digest = hashlib.sha256(data).hexdigest()
+    for suffix, compress in compressors.items():
+        if compressed == digest and os.path.exists(out_path + suffix):
+            continue
+        with profiling.timed("compress", suffix):
+            output_writer.write_bytes(out_path + suffix, compress(data))
+    return digest
+
+def build_assets(root=".", out_dir=DIST_DIR, manifest_path=ASSET_MANIFEST_PATH, workers=None):
+    """Copy the site at root into out_dir with fingerprinted and precompressed assets."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    files = site_files(root, out_dir)
+    print(f"Preparing {len(files)} site files for {out_dir}...")
+    outputs = plan_outputs(root, files)
+    compressors = get_compressors()
+    manifest = load_asset_manifest(manifest_path)
+
+    # zlib and brotli release the GIL, so threads compress in parallel
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {path: executor.submit(write_output, root, out_dir, path, content, compressors, manifest.get(path))
+                   for path, content in sorted(outputs.items())}
+        new_manifest = {path: future.result() for path, future in futures.items()}
+    new_manifest = {path: digest for path, digest in new_manifest.items() if digest is not None}
+
+    # Remove outputs that are no longer produced (old fingerprints, deleted files, stale variants)
+    expected = set(outputs)
+    expected |= {path + suffix for path in new_manifest for suffix in compressors}
+    for directory, _, filenames in os.walk(out_dir):
+        for name in filenames:
+            path = os.path.relpath(os.path.join(directory, name), out_dir).replace(os.sep, "/")
+            if path not in expected:
+                output_writer.remove(os.path.join(directory, name))
+    save_asset_manifest(new_manifest, manifest_path)
+    print(f"Assets written to {out_dir} ({len(files)} files, {len(outputs) - len(files)} fingerprinted, "
+          f"{len(new_manifest)} precompressed)\n")
@@ -0,0 +1,332 @@
+"""
+AsaLexer engines: equivalence check and throughput benchmark.
+
+ReferenceAsaLexer is AsaLexer as it was: a frozen copy of the original
+rule table run by Pygments' RegexLexer engine. Token streams are compared
+once adjacent tokens of the same type are merged, which is all the HTML
+formatter sees:
+
+- random inputs: the combined-pattern engine must match RegexLexer on
+  the original rules, and on the current ones (fast=False)
+- synthetic Asa corpora of growing size: AsaLexer must match the
+  reference outright, and is timed against it
+
+The current rules only differ from the original ones on unterminated
+strings and characters (see EXPECTED_DIFFERENCES). Any mismatch exits
+with an error before timings are printed. tests/test_asa_lexer.py runs
+the same checks on a fixed seed under pytest.
+
+Run from the repository root:
+
+    python -m benchmarks.asa_lexer [--sizes 10,100,1000] [--fuzz N]
+
+Sizes are in KB.
+"""
+
+import argparse
+import random
+import time
+
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexer import RegexLexer, bygroups, words
+from pygments.token import Comment, Keyword, Name, Number, Operator, Punctuation, String, Text
+
+from asa_lexer import AsaLexer
+
+# AsaLexer's rule table before the combined-pattern engine and the linear-time
+# rewrites, copied verbatim. Do not edit: it is what "as it was" means.
+ORIGINAL_TOKENS = {
+    'root': [
+        # Single-line comments
+        (r'//.*?$', Comment.Single),
+
+        # Multi-line comments
+        (r'/\*', Comment.Multiline, 'comment'),
+
+        # Compiler directives - #import (handled specially to allow colon highlighting)
+        (r'(#import)(\s+)', bygroups(Keyword.Namespace, Text), 'import_path'),
+
+        # Other compiler directives - matches any #directive pattern
+        (r'#[a-zA-Z_]\w*\b', Keyword.Namespace),
+
+        # Operator overloading: operator<symbol> :: ... - MUST come before 'operator' keyword
+        (r'(operator\s*[+\-*/%=<>!&|^~@$?]+)(\s*)(::)',
+         bygroups(Operator, Text, Operator)),
+
+        # Control flow keywords
+        (words((
+            'if', 'else', 'while', 'for', 'return', 'break', 'continue',
+            'throw', 'test', 'match', 'finally', 'in', 'yield', 'where',
+            'unsafe', 'try', 'await'
+        ), suffix=r'\b'), Keyword),
+
+        # Declaration/structure keywords
+        (words((
+            'struct', 'enum', 'module', 'operator', 'cast', 'create', 'destroy',
+            'impl', 'let', 'macro', 'pub', 'use', 'mod', 'trait', 'extern',
+            'union', 'as', 'box', 'dyn'
+        ), suffix=r'\b'), Keyword.Type),
+
+        # Storage keywords
+        (words(('move', 'exact', 'ref', 'static', 'const'), suffix=r'\b'),
+         Keyword.Declaration),
+
+        # Built-in types
+        (words((
+            'int', 'int8', 'int16', 'int32', 'int64', 'int128',
+            'uint', 'uint8', 'uint16', 'uint32', 'uint64', 'uint128',
+            'char', 'uchar', 'bool', 'double', 'float', 'float32', 'float64',
+            'half', 'string', 'function', 'any', 'list', 'array', 'iterator'
+        ), suffix=r'\b'), Keyword.Type),
+
+        # Boolean and special literals
+        (r'\b(true|false)\b', Keyword.Constant),
+        (r'\b(this|void|super)\b', Name.Builtin.Pseudo),
+
+        # Function definitions: name :: type(...) or name :: (...)
+        # This needs to come before the general :: operator
+        (r'([a-zA-Z_]\w*)(\s*)(::)(\s*)([a-zA-Z_]\w*)(\s*)(\()',
+         bygroups(Name.Function, Text, Operator, Text, Keyword.Type, Text, Punctuation)),
+        (r'([a-zA-Z_]\w*)(\s*)(::)(\s*)(\()',
+         bygroups(Name.Function, Text, Operator, Text, Punctuation)),
+
+        # Function calls
+        (r'([a-zA-Z_]\w*)(\s*)(\()',
+         bygroups(Name.Function, Text, Punctuation)),
+
+        # Type annotations: name : type or name : *type or name : const/ref/exact type
+        (r'([a-zA-Z_]\w*)(\s*)(:)(\s*)(\*?)(\s*)((?:const|ref|exact)\s+)?(\*?)(\s*)([a-zA-Z_]\w*)',
+         bygroups(Name.Variable, Text, Punctuation, Text, Operator, Text,
+                 Keyword.Declaration, Operator, Text, Keyword.Type)),
+
+        # Compile-time define operator ::
+        (r'::', Operator),
+
+        # Range operator
+        (r'\.\.\.?', Operator),
+
+        # Member access
+        (r'\.', Punctuation),
+
+        # Logical operators
+        (r'(&&|\|\|)', Operator),
+
+        # Comparison and arithmetic operators
+        (r'(\+\+|--|<<|>>|<=|>=|==|!=|\+=|-=|\*=|/=|%=|&=|\|=|\^=|<<=|>>=)',
+         Operator),
+        (r'[-+*/%=<>!&|^~@]', Operator),
+
+        # Pointer and reference operators
+        (r'\*(?!=)', Operator),  # Pointer, not followed by =
+        (r'&(?!=)', Operator),   # Reference, not followed by =
+
+        # Arrow operator
+        (r'->', Operator),
+
+        # Question mark
+        (r'\?', Operator),
+
+        # Numbers - hexadecimal
+        (r'0[xX][0-9a-fA-F_]+', Number.Hex),
+
+        # Numbers - octal
+        (r'0[oO][0-7_]+', Number.Oct),
+
+        # Numbers - binary
+        (r'0[bB][01_]+', Number.Bin),
+
+        # Numbers - floating point
+        (r'\d[\d_]*\.(?!\.)[\d_]*([eE][+-]?[\d_]+)?(f32|f64)?', Number.Float),
+        (r'\d[\d_]*([eE][+-]?[\d_]+)(f32|f64)?', Number.Float),
+        (r'\d[\d_]*\.(f32|f64)', Number.Float),
+
+        # Numbers - integer
+        (r'\d[\d_]*', Number.Integer),
+
+        # Strings
+        (r'b?"([^"\\]|\\.)*"', String),
+        (r'br#+".*?"#+', String),  # Raw strings
+
+        # Characters
+        (r"b?'([^'\\]|\\.)+'", String.Char),
+
+        # Punctuation
+        (r'[{}()\[\];,]', Punctuation),
+
+        # Identifiers
+        (r'[a-zA-Z_]\w*', Name),
+
+        # Whitespace
+        (r'\s+', Text),
+    ],
+
+    'comment': [
+        (r'[^*/]', Comment.Multiline),
+        (r'/\*', Comment.Multiline, '#push'),
+        (r'\*/', Comment.Multiline, '#pop'),
+        (r'[*/]', Comment.Multiline),
+    ],
+
+    'import_path': [
+        # Module name component
+        (r'[A-Za-z_][A-Za-z0-9_]*', Name.Namespace),
+        # Colon separator
+        (r':', Punctuation),
+        # Asterisk for wildcard imports
+        (r'\*', Operator),
+        # Semicolon ends the import
+        (r';', Punctuation, '#pop'),
+        # Whitespace
+        (r'\s+', Text),
+    ]
+}
+
+
+class ReferenceAsaLexer(RegexLexer):
+    """AsaLexer as it was: the original rules, matched one by one by Pygments' RegexLexer engine."""
+
+    name = 'Asa (original)'
+    tokens = ORIGINAL_TOKENS
+
+
+class OriginalRulesAsaLexer(AsaLexer):
+    """The combined-pattern engine running the original rules, to check the engine on its own."""
+
+    tokens = ORIGINAL_TOKENS
+
+
+# Inputs on which the current rules intentionally differ from the original
+# ones (linear-time rewrites): unterminated strings, characters and raw
+# strings used to be a lone Error token at the quote, followed by whatever
+# came after it; now they run to the end of the block (raw strings: of the line).
+EXPECTED_DIFFERENCES = [
+    'x = "unterminated',
+    'x = "unterminated\ny = 1;',
+    "c = 'a",
+    'b"no end',
+    'r = br#"no end\nx',
+    'a = "one" + "two',
+]
+
+
+IDENTIFIERS = ["x", "count", "buffer", "node_next", "Vec3", "i", "result", "_tmp"]
+TYPES = ["int", "uint8", "float", "string", "bool", "double", "Vec3", "list"]
+
+def random_statement(rng):
+    name = rng.choice(IDENTIFIERS)
+    kind = rng.randrange(12)
+    if kind == 0:
+        return f"{name} : {rng.choice(['', '*', 'const ', 'ref *'])}{rng.choice(TYPES)} = {rng.randint(0, 9999)};"
+    if kind == 1:
+        return f"{name}({rng.choice(IDENTIFIERS)}, {rng.random() * 100:.3f}f32, 0x{rng.randrange(1 << 16):X});"
+    if kind == 2:
+        return f'print("{name} = \\"{rng.randint(0, 99)}\\"\\n");'
+    if kind == 3:
+        return f"// {' '.join(rng.choice(IDENTIFIERS) for _ in range(rng.randint(1, 8)))}"
+    if kind == 4:
+        return f"if ({name} >= {rng.randint(0, 9)} && {rng.choice(IDENTIFIERS)} != 0) {{ return {name}; }}"
+    if kind == 5:
+        return f"for (i : int = 0; i < {rng.randint(1, 100)}; i++) {{ {name} += i * 2; }}"
+    if kind == 6:
+        return f"{name} = br#\"raw {rng.choice(IDENTIFIERS)}\"#; c : char = '{rng.choice('abc')}';"
+    if kind == 7:
+        return f"while (true) {{ {name}--; if ({name} <= 0) {{ break; }} }}"
+    if kind == 8:
+        return f"{name} = {rng.randint(1, 9)}.{rng.randint(0, 99)}e-{rng.randint(1, 9)} + 1_000_000 + 0b1010 + 0o17;"
+    if kind == 9:
+        return f"{name}.field = {rng.choice(IDENTIFIERS)}->next ? 1...10 : this;"
+    if kind == 10:
+        return f"let {name} = cast {rng.choice(TYPES)} (move {rng.choice(IDENTIFIERS)});"
+    return f"{name} = {rng.choice(IDENTIFIERS)} << 2 | ~{rng.choice(IDENTIFIERS)} ^ @{name};"
+
+def random_block_comment(rng, size):
+    words = " ".join(rng.choice(IDENTIFIERS + ["*", "/", "a/b", "2*3"]) for _ in range(size // 4))
+    return "/* " + words + " /* nested */ " + words[:size // 4] + " */"
+
+def generate_corpus(size, rng):
+    """Asa source of roughly `size` characters: imports, functions, structs and comments."""
+    parts = ["#import Core:IO:*;", "#import Math;", "#define DEBUG", ""]
+    length = 0
+    while length < size:
+        kind = rng.randrange(8)
+        if kind == 0:
+            chunk = random_block_comment(rng, rng.choice([200, 2000, 10000]))
+        elif kind == 1:
+            chunk = f"{rng.choice(IDENTIFIERS)} :: struct {{\n    a : int;\n    b : *float;\n}}"
+        elif kind == 2:
+            chunk = f"operator+ :: {rng.choice(TYPES)}(a : {rng.choice(TYPES)}, b : {rng.choice(TYPES)}) {{\n    return a + b;\n}}"
+        else:
+            body = "\n".join("    " + random_statement(rng) for _ in range(rng.randint(3, 15)))
+            chunk = f"{rng.choice(IDENTIFIERS)} :: {rng.choice(TYPES)}({rng.choice(IDENTIFIERS)} : int) {{\n{body}\n}}"
+        parts.append(chunk)
+        length += len(chunk) + 1
+    return "\n".join(parts) + "\n"
+
+def random_soup(rng, size):
+    """Unstructured input, to exercise error recovery and unterminated constructs."""
+    alphabet = ["a", "b", "r", "#", '"', "'", "/", "*", ":", "(", ")", "{", "0", "1", ".", "e", "x",
+                "_", " ", "\n", "\\", "-", ">", "import", "operator", "const", "f32", "if"]
+    return "".join(rng.choice(alphabet) for _ in range(size))
+
+
+def merged(tokens):
+    """Join adjacent tokens of the same type, as the HTML formatter does."""
+    result = []
+    for ttype, value in tokens:
+        if result and result[-1][0] is ttype:
+            result[-1][1] += value
+        else:
+            result.append([ttype, value])
+    return result
+
+def check_equivalent(text, fast, reference):
+    fast_tokens = merged(fast.get_tokens(text))
+    reference_tokens = merged(reference.get_tokens(text))
+    if fast_tokens != reference_tokens:
+        for i, (a, b) in enumerate(zip(fast_tokens, reference_tokens)):
+            if a != b:
+                raise SystemExit(f"Token streams differ at token {i}: fast {a!r}, reference {b!r}")
+        raise SystemExit(f"Token streams differ in length: fast {len(fast_tokens)}, reference {len(reference_tokens)}")
+
+
+def timed(func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000", help="corpus sizes in KB, comma separated")
+    parser.add_argument("--fuzz", type=int, default=2000, help="number of random inputs to check")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    fast = AsaLexer()
+    reference = ReferenceAsaLexer()
+    formatter = HtmlFormatter()
+
+    engines = [(OriginalRulesAsaLexer(), reference), (fast, AsaLexer(fast=False))]
+    for _ in range(args.fuzz):
+        text = random_soup(rng, rng.randint(0, 200))
+        for engine, regex_lexer in engines:
+            check_equivalent(text, engine, regex_lexer)
+    print(f"{args.fuzz} random inputs: combined-pattern and RegexLexer token streams identical")
+
+    print(f"\n{'size KB':>8}{'tokens':>9}{'ref lex s':>11}{'fast lex s':>12}{'ref html s':>12}{'fast html s':>13}{'speedup':>9}")
+    for size_kb in (int(s) for s in args.sizes.split(",")):
+        text = generate_corpus(size_kb * 1024, rng)
+        check_equivalent(text, fast, reference)
+        repeat = max(1, 1000 // size_kb)
+        ref_lex = timed(lambda: sum(1 for _ in reference.get_tokens(text)), repeat)
+        fast_lex = timed(lambda: sum(1 for _ in fast.get_tokens(text)), repeat)
+        ref_html = timed(lambda: highlight(text, reference, formatter), repeat)
+        fast_html = timed(lambda: highlight(text, fast, formatter), repeat)
+        tokens = sum(1 for _ in fast.get_tokens(text))
+        print(f"{size_kb:>8}{tokens:>9}{ref_lex:>11.3f}{fast_lex:>12.3f}{ref_html:>12.3f}{fast_html:>13.3f}{ref_html / fast_html:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Catastrophic-backtracking detector for the AsaLexer rules.
+
+Pathological inputs are built by "pumping": prefix + pump * n + suffix,
+with n doubling until the input is large or a match gets too slow. Known
+hard cases (long whitespace runs inside type annotations, unterminated
+strings full of escaped quotes, raw string openers with no closer) are
+always tried. Random pumps built from Asa fragments are added to them.
+
+Two things are timed for every input:
+
+- each rule's regex, matched once at the start of the input
+- the whole lexer, which also catches rules that fail slowly at many
+  positions, even when no single match is slow
+
+The scaling exponent is the slope of log(time) against log(n) between
+the smallest and largest measurable sizes: about 1 is linear, 2 quadratic, 3 cubic. It exits with
+an error if any exponent is above --max-exponent.
+
+Run from the repository root:
+
+    python -m benchmarks.asa_lexer_fuzz [--cases N] [--max-exponent 1.5]
+"""
+
+import argparse
+import gc
+import math
+import random
+import time
+
+from asa_lexer import AsaLexer
+
+SEEDS = [
+    # (prefix, pump, suffix)
+    ("a", " ", ""),
+    ("a :", " ", ";"),
+    ("a : *", " ", ""),
+    ("a : const", " ", ""),
+    ('"', '\\"', ""),
+    ("'", "\\'", ""),
+    ("", 'br#"', ""),
+    ("br#", "#", ""),
+    ("", '"', "\\\n"),
+    ("/*", "/", ""),
+    ("/*", "/*", ""),
+    ("1", "_", ".e"),
+    ("1.", "1", "e+"),
+    ("operator", "+", " :"),
+    ("#import ", "a:", ""),
+    ("f", " ", ":: g"),
+    ("", "a :", ""),
+    ("", "0x", ""),
+]
+
+FRAGMENTS = [" ", "\n", "\t", "a", "_", "0", "1", ".", "e", "+", "-", "*", "/", ":", "::", '"', "'",
+             "\\", "#", "b", "r", "br#", "(", ")", "{", ";", "const ", "ref", "f32", "operator", "//",
+             "/*", "*/", "#import", "x"]
+
+SIZES = [256, 1024, 4096, 16384]
+# Inputs longer than this (in characters) are not pumped further
+MAX_LENGTH = 128 * 1024
+# Stop growing an input once one measurement takes this long (seconds)
+SLOW = 0.25
+# Times below this are too noisy to fit a slope to
+NOISE_FLOOR = 0.002
+
+
+def random_case(rng):
+    def fragments(low, high):
+        return "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(low, high)))
+    return fragments(0, 3), fragments(1, 3), fragments(0, 2)
+
+def describe(case):
+    return " + ".join(repr(part) + ("*n" if i == 1 else "") for i, part in enumerate(case) if part or i == 1)
+
+
+def timed(func, *args, repeat=3):
+    """Best of `repeat` runs with the garbage collector off; one-off timings are too noisy for the slope."""
+    best = math.inf
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(*args)
+            best = min(best, time.perf_counter() - start)
+            if best > SLOW:
+                break
+    finally:
+        gc.enable()
+    return best
+
+def lex(lexer, text):
+    for _ in lexer.get_tokens_unprocessed(text):
+        pass
+
+def exponent(points):
+    """Slope of log(time) over log(n) between the first and last measurable sizes, or None."""
+    points = [(n, t) for n, t in points if t >= NOISE_FLOOR]
+    if len(points) < 2:
+        return None
+    (n1, t1), (n2, t2) = points[0], points[-1]
+    return math.log(t2 / t1) / math.log(n2 / n1)
+
+
+def measure(case, lexer, rules):
+    """Time the lexer and every rule on case pumped to each size. Returns {name: [(n, time), ...]}."""
+    prefix, pump, suffix = case
+    points = {}
+    slow = set()
+    for n in SIZES:
+        text = prefix + pump * n + suffix
+        if len(text) > MAX_LENGTH:
+            break
+        for name, rexmatch in rules:
+            if name in slow:
+                continue
+            t = timed(rexmatch, text, 0)
+            points.setdefault(name, []).append((n, t))
+            if t > SLOW:
+                slow.add(name)
+        if "lexer" not in slow:
+            t = timed(lex, lexer, text)
+            points.setdefault("lexer", []).append((n, t))
+            if t > SLOW:
+                slow.add("lexer")
+        if "lexer" in slow:
+            break
+    return points
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=int, default=100, help="number of random pumps on top of the seeds")
+    parser.add_argument("--max-exponent", type=float, default=1.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    lexer = AsaLexer()
+    rules = []
+    patterns = {}
+    for state, statetokens in lexer._tokens.items():
+        for i, (rexmatch, _, _) in enumerate(statetokens):
+            name = f"{state}[{i}]"
+            rules.append((name, rexmatch))
+            patterns[name] = rexmatch.__self__.pattern
+    patterns["lexer"] = "(whole lexer)"
+
+    rng = random.Random(args.seed)
+    cases = SEEDS + [random_case(rng) for _ in range(args.cases)]
+
+    # name -> (exponent, time at the largest size, case)
+    worst = {}
+    for case in cases:
+        for name, points in measure(case, lexer, rules).items():
+            slope = exponent(points)
+            last_time = points[-1][1]
+            previous = worst.get(name)
+            if previous is None or (slope or 0, last_time) > (previous[0] or 0, previous[1]):
+                worst[name] = (slope, last_time, case)
+
+    print(f"{len(cases)} pumped inputs, n up to {SIZES[-1]}\n")
+    print(f"{'rule':<16}{'exponent':>9}{'worst ms':>10}  worst input / pattern")
+    failures = []
+    for name, _ in rules + [("lexer", None)]:
+        slope, last_time, case = worst[name]
+        print(f"{name:<16}{'-' if slope is None else f'{slope:.2f}':>9}{last_time * 1000:>10.2f}  {describe(case)}")
+        print(f"{'':<37}{patterns[name][:100]}")
+        if slope is not None and slope > args.max_exponent:
+            failures.append(name)
+    if failures:
+        raise SystemExit(f"\nSuperlinear: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
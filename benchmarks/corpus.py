@@ -0,0 +1,122 @@
+"""
+Synthetic b_md corpora for benchmarking the blog pipeline.
+
+Posts are built from the same parts as the real ones: a <title>, a
+thumbnail, headings, prose paragraphs, fenced code (Asa or other
+languages), inline notes after code blocks and weighted --- rules.
+Generation is deterministic for a given seed.
+
+    python -m benchmarks.corpus OUT_DIR [--posts 10000] [--size 4000] [--code 0.3] [--asa 0.7]
+                                        [--notes 0.2] [--rules 0.1] [--seed 0]
+
+--size is the approximate length of a post in characters. --code is
+the share of each post that is code. --asa is the share of code blocks
+written in Asa. --notes is the share of code blocks followed by an
+inline note. --rules is the chance that a section ends with a rule.
+"""
+
+import argparse
+import os
+import random
+
+from benchmarks.asa_lexer import random_statement, IDENTIFIERS, TYPES
+
+WORDS = ("the lexer pipeline renders every post into static pages while keeping a manifest of hashes so that "
+         "unchanged sources skip work and the home page lists titles thumbnails and short descriptions").split()
+
+OTHER_LANGUAGES = {
+    "py": lambda rng, i: f"def {rng.choice(IDENTIFIERS)}_{i}(x):\n    return x * {rng.randint(1, 9)}  # comment",
+    "cpp": lambda rng, i: f"int {rng.choice(IDENTIFIERS)}_{i}(int x) {{\n    return x << {rng.randint(1, 4)}; // shift\n}}",
+    "js": lambda rng, i: f"const {rng.choice(IDENTIFIERS)}{i} = (a, b) => a + b * {rng.randint(1, 9)};",
+    "bash": lambda rng, i: f"for f in *.md; do echo \"$f\" | wc -c; done  # {i}",
+}
+
+RULES = ["---", "----", "-----", "------"]
+NOTE_TYPES = ["note", "tip", "warning"]
+
+
+def sentence(rng, words):
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    if rng.random() < 0.3:
+        text += f" with `{rng.choice(IDENTIFIERS)}` and *{rng.choice(WORDS)}*"
+    return text[0].upper() + text[1:] + "."
+
+def paragraph(rng):
+    return " ".join(sentence(rng, rng.randint(6, 16)) for _ in range(rng.randint(2, 5)))
+
+def asa_block(rng, lines):
+    body = "\n".join("    " + random_statement(rng) for _ in range(lines))
+    return f"```asa\n{rng.choice(IDENTIFIERS)} :: {rng.choice(TYPES)}(x : int) {{\n{body}\n}}\n```"
+
+def other_block(rng, lines):
+    language = rng.choice(sorted(OTHER_LANGUAGES))
+    return f"```{language}\n" + "\n".join(OTHER_LANGUAGES[language](rng, i) for i in range(lines)) + "\n```"
+
+def generate_post(rng, index, size=4000, code=0.3, asa=0.7, notes=0.2, rules=0.1):
+    """Markdown source of one post, roughly `size` characters long."""
+    parts = [f"<title>Post {index}: {sentence(rng, 4)[:-1]}</title>", ""]
+    if rng.random() < 0.8:
+        parts += [f'<img src="../images/post{index}.png">', ""]
+    parts += [f"# {sentence(rng, 5)[:-1]}", "", paragraph(rng), ""]
+    length = sum(len(part) + 1 for part in parts)
+    code_length = 0
+    while length < size:
+        if code_length < code * max(length, 1):
+            lines = rng.randint(3, 25)
+            block = asa_block(rng, lines) if rng.random() < asa else other_block(rng, lines)
+            chunk = [block, ""]
+            if rng.random() < notes:
+                chunk += [f"!!! {rng.choice(NOTE_TYPES)} inline", f"    {sentence(rng, 10)}", f"    {sentence(rng, 8)}", ""]
+            code_length += len(block)
+        else:
+            chunk = []
+            if rng.random() < 0.3:
+                chunk += [f"## {sentence(rng, 4)[:-1]}", ""]
+            chunk += [paragraph(rng), ""]
+            if rng.random() < 0.2:
+                chunk += [f"> {sentence(rng, 12)}", ""]
+        if rng.random() < rules:
+            chunk += [rng.choice(RULES), ""]
+        parts += chunk
+        length += sum(len(part) + 1 for part in chunk)
+    return "\n".join(parts)
+
+def generate_corpus(out_dir, posts=100, seed=0, **options):
+    """Write `posts` generated posts into out_dir. Returns their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    width = len(str(max(posts - 1, 0)))
+    paths = []
+    for index in range(posts):
+        path = os.path.join(out_dir, f"post_{index:0{width}d}.md")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(generate_post(rng, index, **options))
+        paths.append(path)
+    return paths
+
+
+def add_corpus_arguments(parser):
+    parser.add_argument("--posts", type=int, default=100, help="number of posts")
+    parser.add_argument("--size", type=int, default=4000, help="approximate characters per post")
+    parser.add_argument("--code", type=float, default=0.3, help="share of each post that is code")
+    parser.add_argument("--asa", type=float, default=0.7, help="share of code blocks in Asa")
+    parser.add_argument("--notes", type=float, default=0.2, help="share of code blocks with an inline note")
+    parser.add_argument("--rules", type=float, default=0.1, help="chance of a --- rule after each section")
+    parser.add_argument("--seed", type=int, default=0)
+
+def corpus_options(args):
+    return {"size": args.size, "code": args.code, "asa": args.asa, "notes": args.notes, "rules": args.rules}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("out_dir")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+    paths = generate_corpus(args.out_dir, args.posts, args.seed, **corpus_options(args))
+    total = sum(os.path.getsize(path) for path in paths)
+    print(f"Wrote {len(paths)} posts ({total / 1024:.0f} KB) to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
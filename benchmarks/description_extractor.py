@@ -0,0 +1,134 @@
+"""
+extract_description_from_html() on large generated pages: the previous
+slice-and-rematch implementation vs the streaming DescriptionExtractor.
+
+Run from the repository root:
+
+    python -m benchmarks.description_extractor [--sizes 0.25,1,4,16] [--max-chars N]
+
+Sizes are in MB. Each page starts with a long code listing, as in a
+code-heavy post, so the first description paragraph comes late.
+"""
+
+import argparse
+import io
+import os
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from post_metadata import extract_description_from_file, extract_description_from_html
+
+
+def legacy_extract_description_from_html(html_content, max_chars=256):
+    """The implementation extract_description_from_html() replaced, kept for comparison."""
+    start_match = re.search(r'<div class="blog-body">', html_content)
+    if not start_match:
+        return ""
+    start_pos = start_match.end()
+    end_match = re.search(r'</body>', html_content[start_pos:])
+    if not end_match:
+        return ""
+    blog_content = html_content[start_pos:start_pos + end_match.start()]
+
+    text = ""
+    depth = 0
+    i = 0
+    while i < len(blog_content):
+        if blog_content[i] == '<':
+            tag_match = re.match(r'<(\w+)[^>]*>', blog_content[i:])
+            if tag_match:
+                tag_name = tag_match.group(1).lower()
+                if tag_name not in ['p', 'br', 'img', 'hr']:
+                    depth += 1
+                    i += len(tag_match.group(0))
+                    continue
+                if tag_name == 'p' and depth == 0:
+                    p_match = re.match(r'<p>(.*?)</p>', blog_content[i:], re.DOTALL)
+                    if p_match:
+                        p_content = p_match.group(1)
+                        only_contains_tags = bool(re.match(r'^\s*<.+>\s*$', p_content, re.DOTALL))
+                        if only_contains_tags:
+                            i += len(p_match.group(0))
+                            continue
+                        clean_text = re.sub(r'<[^>]+>', '', p_content)
+                        clean_text = clean_text.replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&')
+                        clean_text = clean_text.strip()
+                        if clean_text:
+                            text += clean_text + "\n"
+                            if len(text) >= max_chars:
+                                break
+                        i += len(p_match.group(0))
+                        continue
+            close_match = re.match(r'</(\w+)>', blog_content[i:])
+            if close_match:
+                tag_name = close_match.group(1).lower()
+                if tag_name not in ['p', 'br', 'img', 'hr']:
+                    depth = max(0, depth - 1)
+                i += len(close_match.group(0))
+                continue
+        i += 1
+    return text[:max_chars].strip()
+
+
+def generate_page(size, rng):
+    """A post page of roughly `size` characters, code listing first."""
+    code_line = ('<span class="kt">int</span><span class="w"> </span><span class="n">x</span>'
+                 '<span class="o">=</span><span class="mi">1</span><span class="p">;</span>\n')
+    paragraph = "<p>Some prose with <code>code</code>, <em>emphasis</em> &amp; an &lt;entity&gt;.</p>\n"
+    parts = ['<html><body>\n<div class="blog-body">\n<div class="codehilite"><pre><code>']
+    length = 0
+    while length < size * 0.9:
+        parts.append(code_line)
+        length += len(code_line)
+    parts.append('</code></pre></div>\n<p><title>Benchmark</title></p>\n')
+    while length < size:
+        block = paragraph if rng.random() < 0.7 else '<blockquote>\n' + paragraph + '</blockquote>\n'
+        parts.append(block)
+        length += len(block)
+    parts.append('<br>\n</body>\n</html>\n')
+    return "".join(parts)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="0.25,1,4,16", help="page sizes in MB, comma separated")
+    parser.add_argument("--max-chars", type=int, default=500)
+    parser.add_argument("--legacy-limit", type=float, default=1, help="largest size (MB) to run the quadratic legacy version on")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'size MB':>8}{'legacy s':>11}{'string s':>11}{'file s':>9}{'speedup':>9}")
+    for size_mb in (float(s) for s in args.sizes.split(",")):
+        page = generate_page(int(size_mb * 1024 * 1024), rng)
+        new, new_time = timed(extract_description_from_html, page, args.max_chars)
+
+        with tempfile.NamedTemporaryFile('w', suffix=".html", delete=False, encoding='utf-8') as f:
+            f.write(page)
+        try:
+            from_file, file_time = timed(extract_description_from_file, Path(f.name), args.max_chars)
+        finally:
+            os.remove(f.name)
+        from_stream = extract_description_from_file(io.StringIO(page), args.max_chars)
+        if not (new == from_file == from_stream):
+            raise SystemExit(f"String, file and stream results differ at {size_mb} MB")
+
+        if size_mb <= args.legacy_limit:
+            old, old_time = timed(legacy_extract_description_from_html, page, args.max_chars)
+            if old != new:
+                raise SystemExit(f"Output mismatch at {size_mb} MB")
+            print(f"{size_mb:>8g}{old_time:>11.3f}{new_time:>11.3f}{file_time:>9.3f}{old_time / new_time:>8.0f}x")
+        else:
+            print(f"{size_mb:>8g}{'-':>11}{new_time:>11.3f}{file_time:>9.3f}{'-':>9}")
+
+
+if __name__ == "__main__":
+    main()
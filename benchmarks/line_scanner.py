@@ -0,0 +1,215 @@
+"""
+Custom Markdown syntaxes: one preprocessor per syntax vs the fused line scanner.
+
+The previous HorizontalRulePreprocessor and InlineNotePreprocessor are
+kept below for comparison. Posts, a large generated document and random
+documents are run through both. Their output must be identical before
+anything is timed.
+
+To show how the cost grows with the number of syntaxes, N dummy
+syntaxes that never match are added to each side: N more per-line
+preprocessors for the old approach, N more handlers for the scanner.
+
+Run from the repository root:
+
+    python -m benchmarks.line_scanner [--extra 0,4,16] [--lines N] [--fuzz N] [source_dir]
+"""
+
+import argparse
+import os
+import random
+import re
+import time
+
+from markdown.preprocessors import NormalizeWhitespace, Preprocessor
+
+from line_scanner import LineScannerPreprocessor
+from hr_preprocessor import HR_PATTERN, rewrite_hr
+from inline_note_preprocessor import FENCE_START, inline_note_block
+from markdown_converter import build_markdown
+
+
+class LegacyHorizontalRulePreprocessor(Preprocessor):
+    """The hr_weights preprocessor the line scanner replaced (priority 100)."""
+
+    def run(self, lines):
+        new_lines = []
+        for line in lines:
+            stripped = line.strip()
+            if re.match(r'^-+$', stripped):
+                dash_count = len(stripped)
+                if dash_count == 3:
+                    new_lines.append('<hr class="hr-heavy">')
+                elif dash_count == 4:
+                    new_lines.append('<hr class="hr-medium">')
+                elif dash_count == 5:
+                    new_lines.append('<hr class="hr-light">')
+                elif dash_count >= 6:
+                    new_lines.append('<hr class="hr-mini">')
+                else:
+                    new_lines.append(line)
+            else:
+                new_lines.append(line)
+        return new_lines
+
+
+class LegacyInlineNotePreprocessor(Preprocessor):
+    """The inline_note preprocessor the line scanner replaced (priority 27)."""
+
+    def run(self, lines):
+        new_lines = []
+        i = 0
+        while i < len(lines):
+            line = lines[i]
+            if re.match(r'^```', line):
+                code_block = [line]
+                i += 1
+                while i < len(lines) and not re.match(r'^```\s*$', lines[i]):
+                    code_block.append(lines[i])
+                    i += 1
+                if i < len(lines):
+                    code_block.append(lines[i])
+                    i += 1
+                if i < len(lines):
+                    skipped_lines = []
+                    temp_i = i
+                    while temp_i < len(lines) and lines[temp_i].strip() == '':
+                        skipped_lines.append(lines[temp_i])
+                        temp_i += 1
+                    if temp_i < len(lines):
+                        admon_match = re.match(r'^!!!\s+(\w+)\s+inline\s*$', lines[temp_i])
+                        if admon_match:
+                            admon_type = admon_match.group(1)
+                            i = temp_i + 1
+                            admon_content = []
+                            while i < len(lines) and (lines[i].startswith('    ') or lines[i].strip() == ''):
+                                if lines[i].strip():
+                                    admon_content.append(lines[i][4:])
+                                i += 1
+                            new_lines.append('<div class="code-with-inline-note" markdown="1">')
+                            new_lines.append('<div class="inline-code-block" markdown="1">')
+                            new_lines.extend(code_block)
+                            new_lines.append('</div>')
+                            new_lines.append(f'<div class="inline-note inline-note-{admon_type}" markdown="1">')
+                            new_lines.append(f'<div class="inline-note-title">{admon_type.title()}</div>')
+                            new_lines.append('')
+                            new_lines.extend(admon_content)
+                            new_lines.append('')
+                            new_lines.append('</div>')
+                            new_lines.append('</div>')
+                            continue
+                        else:
+                            new_lines.extend(code_block)
+                            new_lines.extend(skipped_lines)
+                            i = temp_i
+                            continue
+                new_lines.extend(code_block)
+            else:
+                new_lines.append(line)
+                i += 1
+        return new_lines
+
+
+class DummyPreprocessor(Preprocessor):
+    """A per-line syntax that never matches, written the way the legacy preprocessors were."""
+
+    def __init__(self, md, marker):
+        super().__init__(md)
+        self.marker = marker
+
+    def run(self, lines):
+        new_lines = []
+        for line in lines:
+            if re.match(self.marker, line):
+                new_lines.append(line.upper())
+            else:
+                new_lines.append(line)
+        return new_lines
+
+
+def legacy_pipeline(md, extra):
+    """Custom preprocessors in the order Markdown ran them, around normalize_whitespace."""
+    dummies = [DummyPreprocessor(md, f'%%dummy{i}%%') for i in range(extra)]
+    return [LegacyHorizontalRulePreprocessor(md), *dummies, NormalizeWhitespace(md), LegacyInlineNotePreprocessor(md)]
+
+def scanner_pipeline(md, extra):
+    scanner = LineScannerPreprocessor(md)
+    scanner.add_block('inline_note', FENCE_START, inline_note_block)
+    scanner.add_rewriter('hr_weights', HR_PATTERN, rewrite_hr)
+    for i in range(extra):
+        scanner.add_rewriter(f'dummy{i}', f'%%dummy{i}%%', lambda m, line: line.upper())
+    return [NormalizeWhitespace(md), scanner]
+
+def run_pipeline(pipeline, text):
+    lines = text.split("\n")
+    for preprocessor in pipeline:
+        lines = preprocessor.run(lines)
+    return lines
+
+
+LINE_KINDS = ["", "", "text with `code` and -- dashes", "---", "----", "-----", "--------", "--", "  ---  ",
+              "\t---", "    ---", "```asa", "```python", "```", "```  ", "x : int = 1;", "    indented",
+              "!!! note inline", "!!! warning inline  ", "!!! tip", "\tTabbed", "- item", "# Heading"]
+
+def random_document(rng, lines):
+    return "\n".join(rng.choice(LINE_KINDS) for _ in range(lines))
+
+def generate_document(rng, lines):
+    """A long post: prose, rules, and code blocks with and without inline notes."""
+    parts = []
+    while len(parts) < lines:
+        kind = rng.randrange(4)
+        if kind == 0:
+            parts += ["```asa"] + [f"x{i} : int = {i};" for i in range(rng.randint(3, 20))] + ["```", ""]
+            if rng.random() < 0.5:
+                parts += ["!!! note inline", "    A note about the code.", "    ---", ""]
+        elif kind == 1:
+            parts += [rng.choice(["---", "----", "-----", "------"]), ""]
+        else:
+            parts += [f"Paragraph {len(parts)} with some *emphasis* and `code`." for _ in range(rng.randint(1, 5))] + [""]
+    return "\n".join(parts)
+
+
+def timed(func, *args, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("source_path", nargs="?", default="./b_md")
+    parser.add_argument("--extra", default="0,4,16", help="dummy syntaxes to add, comma separated")
+    parser.add_argument("--lines", type=int, default=50000, help="lines in the generated document")
+    parser.add_argument("--fuzz", type=int, default=500, help="number of random documents to check")
+    args = parser.parse_args()
+
+    md = build_markdown()
+    rng = random.Random(0)
+    documents = []
+    for file in sorted(os.listdir(args.source_path)):
+        if file.endswith(".md"):
+            with open(os.path.join(args.source_path, file), 'r', encoding='utf-8') as f:
+                documents.append((file, f.read()))
+    documents.append(("generated", generate_document(rng, args.lines)))
+    checks = documents + [(f"random {i}", random_document(rng, rng.randint(0, 40))) for i in range(args.fuzz)]
+
+    for name, text in checks:
+        if run_pipeline(legacy_pipeline(md, 0), text) != run_pipeline(scanner_pipeline(md, 0), text):
+            raise SystemExit(f"Output mismatch for {name}")
+    print(f"{len(checks)} documents: preprocessed lines identical\n")
+
+    extras = [int(n) for n in args.extra.split(",")]
+    header = "".join(f"{f'+{n} old':>10}{f'+{n} new':>10}" for n in extras)
+    print(f"{'document':<24}{'lines':>8}{header}   (ms)")
+    for name, text in documents:
+        row = ""
+        for n in extras:
+            legacy, scanner = legacy_pipeline(md, n), scanner_pipeline(md, n)
+            row += f"{timed(run_pipeline, legacy, text) * 1000:>10.2f}{timed(run_pipeline, scanner, text) * 1000:>10.2f}"
+        print(f"{name:<24}{text.count(chr(10)) + 1:>8}{row}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Per-post conversion cost: markdown.markdown() vs the shared converter.
+
+Run from the repository root:
+
+    python -m benchmarks.markdown_converter [--repeat N] [source_dir]
+"""
+
+import argparse
+import os
+import time
+
+import markdown
+
+from markdown_converter import convert, get_converter, get_extensions, EXTENSION_CONFIGS
+
+
+def convert_fresh(markdown_text):
+    # What convert_markdown_with_css() did before: a new pipeline per post
+    return markdown.markdown(markdown_text, extensions=get_extensions(), extension_configs=EXTENSION_CONFIGS)
+
+
+def time_per_call(func, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("source_path", nargs="?", default="./b_md")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    posts = []
+    for file in sorted(os.listdir(args.source_path)):
+        if file.endswith(".md"):
+            with open(os.path.join(args.source_path, file), 'r', encoding='utf-8') as f:
+                posts.append((file, f.read()))
+
+    # Warm up imports, lexers and the shared converter before timing
+    get_converter()
+    for file, text in posts:
+        if convert_fresh(text) != convert(text):
+            raise SystemExit(f"Output mismatch for {file}")
+
+    print(f"{'post':<28}{'fresh ms':>10}{'shared ms':>11}{'saved ms':>10}")
+    total_fresh = total_shared = 0.0
+    for file, text in posts:
+        fresh = time_per_call(convert_fresh, text, args.repeat)
+        shared = time_per_call(convert, text, args.repeat)
+        total_fresh += fresh
+        total_shared += shared
+        print(f"{file:<28}{fresh * 1000:>10.2f}{shared * 1000:>11.2f}{(fresh - shared) * 1000:>10.2f}")
+
+    construct = time_per_call(lambda _: markdown.Markdown(extensions=get_extensions(), extension_configs=EXTENSION_CONFIGS), None, args.repeat)
+    print(f"{'total':<28}{total_fresh * 1000:>10.2f}{total_shared * 1000:>11.2f}{(total_fresh - total_shared) * 1000:>10.2f}")
+    print(f"\nPipeline construction alone: {construct * 1000:.2f} ms per post")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Regression benchmark suite for the blog pipeline on a synthetic corpus.
+
+A corpus is generated (see benchmarks/corpus.py) into a temporary
+directory, and each stage is timed on its own:
+
+- convert            convert_markdown_with_css() for every post, highlight cache empty
+- convert_cached     the same with every code block already in the highlight cache
+- home               generate_blog_home() from the build manifest, without thumbnails
+- description        extract_description_from_file() on every rendered page
+- asa_lexer          AsaLexer over every Asa code block in the corpus
+
+Each stage is the best of --repeat runs. Results are compared with the
+baseline stored for the same corpus options. The suite exits with an
+error if any stage is slower than its baseline by more than --threshold
+(and by more than 10 ms, so that noise on very short stages is ignored).
+
+    python -m benchmarks.suite [--posts 200] [corpus options] [--repeat 3]
+                               [--save-baseline] [--baseline PATH] [--threshold 0.25]
+
+Baselines depend on the machine, so they are kept under .cache/ and not
+committed. Save one on the machine the comparisons will run on.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.corpus import add_corpus_arguments, corpus_options, generate_corpus
+
+DEFAULT_BASELINE = "./.cache/benchmarks/baseline.json"
+# Slowdowns smaller than this are timer noise on millisecond stages, whatever the percentage
+MIN_REGRESSION_SECONDS = 0.01
+
+ASA_BLOCK_RE = re.compile(r'^```asa\n(.*?)^```', re.MULTILINE | re.DOTALL)
+
+
+def best_of(repeat, func, setup=None):
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_stages(work_dir, paths, repeat):
+    """Time each stage on the corpus at paths. Returns {stage: seconds}."""
+    import generateblog
+    import highlight_cache
+    from asa_lexer import AsaLexer
+    from markdown_converter import get_converter
+    from post_metadata import extract_description_from_file
+
+    cache_dir = os.path.join(work_dir, "highlight")
+    out_dir = os.path.join(work_dir, "b")
+    manifest_path = os.path.join(work_dir, "manifest.json")
+    os.makedirs(out_dir)
+    get_converter()
+    highlight_cache.install(highlight_cache.HighlightCache(cache_dir))
+    jobs = [(path, "../samuelhp_files/styles.css", os.path.join(out_dir, os.path.basename(path)[:-3] + ".html"))
+            for path in paths]
+
+    def convert():
+        for job in jobs:
+            generateblog.convert_markdown_with_css(*job)
+
+    def empty_highlight_cache():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    results = {}
+    results["convert"] = best_of(repeat, convert, setup=empty_highlight_cache)
+    results["convert_cached"] = best_of(repeat, convert)
+
+    # The home page reads what the real build stored in the manifest. Thumbnails are off: the
+    # corpus's images don't exist, and the thumbnail cache would be the repository's own
+    with contextlib.redirect_stdout(io.StringIO()):
+        generateblog.convert_pages_to_html(os.path.dirname(paths[0]), out_dir, manifest_path=manifest_path)
+        results["home"] = best_of(repeat, lambda: generateblog.generate_blog_home(
+            source_path=os.path.dirname(paths[0]), out_path=out_dir, manifest_path=manifest_path, thumbnails=False))
+
+    pages = [Path(out_dir, name) for name in sorted(os.listdir(out_dir)) if name.startswith("post_")]
+    results["description"] = best_of(repeat, lambda: [extract_description_from_file(page, 500) for page in pages])
+
+    blocks = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            blocks.extend(ASA_BLOCK_RE.findall(f.read()))
+    lexer = AsaLexer()
+    results["asa_lexer"] = best_of(repeat, lambda: [sum(1 for _ in lexer.get_tokens(block)) for block in blocks])
+    return results
+
+
+def corpus_key(args):
+    options = corpus_options(args)
+    return f"posts={args.posts} seed={args.seed} " + " ".join(f"{name}={value}" for name, value in sorted(options.items()))
+
+def load_baselines(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_corpus_arguments(parser)
+    parser.set_defaults(posts=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, as a fraction of the baseline")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="blog-bench-")
+    try:
+        paths = generate_corpus(os.path.join(work_dir, "b_md"), args.posts, args.seed, **corpus_options(args))
+        size_kb = sum(os.path.getsize(path) for path in paths) / 1024
+        print(f"Corpus: {args.posts} posts, {size_kb:.0f} KB ({corpus_key(args)})\n")
+        results = run_stages(work_dir, paths, args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    key = corpus_key(args)
+    baselines = load_baselines(args.baseline)
+    baseline = baselines.get(key, {})
+    print(f"{'stage':<16}{'seconds':>10}{'ms/post':>10}{'baseline':>10}{'change':>9}")
+    regressions = []
+    for stage, seconds in results.items():
+        previous = baseline.get(stage)
+        if previous:
+            compared = f"{previous:>10.3f}{(seconds / previous - 1) * 100:>+8.0f}%"
+        else:
+            compared = f"{'-':>10}{'-':>9}"
+        print(f"{stage:<16}{seconds:>10.3f}{seconds / args.posts * 1000:>10.2f}{compared}")
+        if previous and seconds > previous * (1 + args.threshold) and seconds - previous > MIN_REGRESSION_SECONDS:
+            regressions.append(stage)
+
+    if args.save_baseline:
+        baselines[key] = {stage: round(seconds, 6) for stage, seconds in results.items()}
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+    elif not baseline:
+        print("\nNo baseline for this corpus yet; run with --save-baseline to store one")
+
+    if regressions:
+        raise SystemExit(f"\nRegressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
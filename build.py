@@ -0,0 +1,221 @@
+"""
+Command line entry point for building the site.
+
+    python build.py blog       [-j N] [--force] [--page-size N] [--offline] [--watch [--serve [PORT]]]
+    python build.py home       [--page-size N] [--offline]
+    python build.py portfolio  [--token TOKEN] [--offline] [--graphql]
+    python build.py sprites    [--force]
+    python build.py pomodoro   [--full] [--ingest EXPORT ...]
+    python build.py fonts      [--root .] [--force]
+    python build.py assets     [--root .] [--dist ./dist] [-j N]
+    python build.py all        (blog, portfolio, sprites, pomodoro, fonts, then assets)
+
+    python build.py --changes changes.json blog
+    python build.py --profile build-profile.json [--cprofile build.prof] blog
+
+`blog` renders changed posts and then the blog home page. `home` only
+rebuilds the home page from the build manifest, newest posts first and
+split into pages of --page-size posts. The token can also come from the
+GITHUB_TOKEN environment variable. --offline builds without network
+access: the portfolio from cached responses, and the blog and portfolio
+cards without fetching remote images that have no thumbnails yet.
+
+The generator modules are imported only once a command has been picked.
+Markdown, Pygments and requests load only when a post is rendered or the
+portfolio is fetched, so --help and up-to-date builds start quickly.
+
+Pages are only rewritten when their content changes (see output_writer.py).
+--changes writes the list of files written or removed by this run as JSON,
+so a deploy only has to upload and invalidate those. `sprites` packs the
+home page's animation frames into sprite atlases (see sprites.py) when
+they have changed. `pomodoro` adds newly logged sessions to the data
+dashboard's summary, after merging any --ingest exports from the
+pomodoro app into the history (see pomodoro.py). `fonts` subsets the
+stylesheet's fonts to the characters the pages use, as WOFF2 (see
+fonts.py). `assets` copies the built site into --dist with
+fingerprinted, precompressed assets (see assets.py). The card thumbnails
+in thumbs/ are not committed, so deploy what `all` puts in --dist: it
+builds them before copying the site.
+
+--profile writes per-stage timings (see profiling.py) as JSON; --cprofile
+also dumps cProfile stats for the main thread, for pstats or snakeviz.
+"""
+
+import argparse
+import os
+
+import output_writer
+import profiling
+
+
+def add_blog_paths(parser):
+    parser.add_argument("--source", default="./b_md", help="directory of Markdown posts (default: %(default)s)")
+    parser.add_argument("--out", default="./b", help="output directory for the blog (default: %(default)s)")
+    parser.add_argument("--page-size", type=int, default=None,
+                        help="posts per blog home page (default: generateblog.BLOG_PAGE_SIZE)")
+    parser.add_argument("--no-thumbnails", dest="thumbnails", action="store_false",
+                        help="show the original images on blog cards instead of resized variants")
+
+def add_blog_options(parser):
+    parser.add_argument("--css", default="../samuelhp_files/styles.css",
+                        help="stylesheet href used by post pages (default: %(default)s)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of rendering processes (0 = one per CPU core)")
+    parser.add_argument("--force", action="store_true", help="re-render every post, even if up to date")
+
+def add_watch_options(parser):
+    parser.add_argument("--style", default="./samuelhp_files/styles.css",
+                        help="stylesheet file to watch (default: %(default)s)")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and rebuild whenever a post, extension module or the stylesheet changes")
+    parser.add_argument("--serve", type=int, nargs="?", const=8000, metavar="PORT",
+                        help="watch, and serve a live-reloading preview (default port 8000)")
+
+def add_portfolio_options(parser):
+    parser.add_argument("--user", default="sam-astro", help="GitHub user to list (default: %(default)s)")
+    parser.add_argument("--token", default=os.environ.get("GITHUB_TOKEN"),
+                        help="GitHub token (default: $GITHUB_TOKEN)")
+    parser.add_argument("--portfolio-out", default="portfolio.html", help="output file (default: %(default)s)")
+    parser.add_argument("--graphql", action="store_true", help="fetch with one batched GraphQL query per page")
+
+def add_offline_option(parser):
+    parser.add_argument("--offline", action="store_true",
+                        help="don't use the network: cached GitHub responses only, no remote thumbnail images")
+
+def add_asset_options(parser):
+    parser.add_argument("--root", default=".", help="site root to copy from (default: %(default)s)")
+    parser.add_argument("--dist", default="./dist", help="output directory for the deployable site (default: %(default)s)")
+
+
+def build_blog(args):
+    import generateblog
+    if getattr(args, "watch", False) or getattr(args, "serve", None) is not None:
+        generateblog.watch_blog(args.source, args.out, args.css, args.style, args.serve, offline=args.offline,
+                                page_size=args.page_size or generateblog.BLOG_PAGE_SIZE, thumbnails=args.thumbnails)
+        return
+    with profiling.timed("stage", "posts"):
+        generateblog.convert_pages_to_html(args.source, args.out, args.css, force=args.force,
+                                           workers=args.jobs or os.cpu_count())
+    build_home(args)
+
+def build_home(args):
+    import generateblog
+    with profiling.timed("stage", "home"):
+        generateblog.generate_blog_home(source_path=args.source, out_path=args.out,
+                                        page_size=args.page_size or generateblog.BLOG_PAGE_SIZE, thumbnails=args.thumbnails,
+                                        offline=args.offline)
+
+def build_portfolio(args):
+    import generateportfolio
+    with profiling.timed("stage", "portfolio"):
+        generateportfolio.generate_portfolio(args.user, args.token, out_path=args.portfolio_out, offline=args.offline,
+                                             backend="graphql" if args.graphql else "rest")
+
+def build_sprites(args):
+    import sprites
+    with profiling.timed("stage", "sprites"):
+        sprites.build_atlases(force=getattr(args, "force_sprites", False))
+
+def build_pomodoro(args):
+    import pomodoro
+    with profiling.timed("stage", "pomodoro"):
+        if getattr(args, "ingest", None):
+            pomodoro.ingest(args.ingest, full=args.full_pomodoro)
+        else:
+            pomodoro.update_summary(full=getattr(args, "full_pomodoro", False))
+
+def build_fonts(args):
+    import fonts
+    with profiling.timed("stage", "fonts"):
+        fonts.build_fonts(args.root, force=getattr(args, "force_fonts", False))
+
+def build_assets(args):
+    import assets
+    with profiling.timed("stage", "assets"):
+        assets.build_assets(args.root, args.dist, workers=args.jobs or os.cpu_count())
+
+def build_all(args):
+    build_blog(args)
+    build_portfolio(args)
+    build_sprites(args)
+    build_pomodoro(args)
+    build_fonts(args)
+    build_assets(args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build samuelhp.com.")
+    parser.add_argument("--changes", metavar="FILE", help="write the paths this build changed to FILE as JSON")
+    parser.add_argument("--profile", metavar="REPORT", help="write a JSON timing report to REPORT")
+    parser.add_argument("--cprofile", metavar="DUMP", help="write cProfile stats to DUMP")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    blog = commands.add_parser("blog", help="render changed posts and the blog home page")
+    add_blog_paths(blog)
+    add_blog_options(blog)
+    add_watch_options(blog)
+    add_offline_option(blog)
+    blog.set_defaults(run=build_blog)
+
+    home = commands.add_parser("home", help="rebuild the blog home page from the build manifest")
+    add_blog_paths(home)
+    add_offline_option(home)
+    home.set_defaults(run=build_home)
+
+    portfolio = commands.add_parser("portfolio", help="fetch GitHub repositories and build portfolio.html")
+    add_portfolio_options(portfolio)
+    add_offline_option(portfolio)
+    portfolio.set_defaults(run=build_portfolio)
+
+    sprites = commands.add_parser("sprites", help="rebuild the sprite atlases whose frames have changed")
+    sprites.add_argument("--force", dest="force_sprites", action="store_true", help="rebuild every atlas")
+    sprites.set_defaults(run=build_sprites)
+
+    pomodoro = commands.add_parser("pomodoro", help="add new pomodoro sessions to the data dashboard's summary")
+    pomodoro.add_argument("--full", dest="full_pomodoro", action="store_true",
+                          help="rebuild the summary (and session index) from the whole history")
+    pomodoro.add_argument("--ingest", nargs="+", metavar="EXPORT",
+                          help="merge exported session CSVs into the history, skipping sessions it already has")
+    pomodoro.set_defaults(run=build_pomodoro)
+
+    font_subsets = commands.add_parser("fonts", help="subset the stylesheet's fonts to the characters the pages use")
+    font_subsets.add_argument("--root", default=".", help="site root (default: %(default)s)")
+    font_subsets.add_argument("--force", dest="force_fonts", action="store_true", help="subset every font again")
+    font_subsets.set_defaults(run=build_fonts)
+
+    site = commands.add_parser("assets", help="copy the site into --dist with fingerprinted, precompressed assets")
+    add_asset_options(site)
+    site.add_argument("-j", "--jobs", type=int, default=0, help="number of compression threads (0 = one per CPU core)")
+    site.set_defaults(run=build_assets)
+
+    everything = commands.add_parser("all", help="blog, portfolio, sprites, pomodoro, fonts, then assets")
+    add_blog_paths(everything)
+    add_blog_options(everything)
+    add_portfolio_options(everything)
+    add_offline_option(everything)
+    add_asset_options(everything)
+    everything.set_defaults(run=build_all)
+
+    args = parser.parse_args(argv)
+    if args.profile:
+        profiling.start()
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        args.run(args)
+        output_writer.print_summary()
+        if args.changes:
+            output_writer.write_change_list(args.changes)
+    finally:
+        if args.cprofile:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+            print(f"cProfile stats written to {args.cprofile}")
+        if args.profile:
+            profiling.write_report(args.profile, {"command": args.command})
+
+
+if __name__ == "__main__":
+    main()
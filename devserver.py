@@ -0,0 +1,176 @@
+"""
+File watching and a live-reloading preview server for the site generators.
+
+FileWatcher polls file modification times, so it needs no extra
+dependencies and sees saves from any editor:
+
+    watcher = FileWatcher(["./b_md"], ["./samuelhp_files/styles.css"])
+    for changed in watcher.changes():
+        ...
+
+PreviewServer serves a directory over HTTP. It adds a small script to
+every HTML page it sends, which listens on /__reload (server-sent events)
+and reloads the page whenever reload() is called. The pages on disk are
+left untouched. The script also reloads after reconnecting to a server
+that has rebuilt since, so restarting the watcher refreshes open tabs
+too.
+"""
+
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+WATCH_INTERVAL = 0.2
+RELOAD_PATH = "/__reload"
+# Sent to idle event streams so dead connections are noticed
+KEEPALIVE_SECONDS = 15
+
+RELOAD_SCRIPT = """<script>
+(function () {
+    var source = new EventSource("%s");
+    var seen = null;
+    source.onmessage = function (event) {
+        if (seen !== null && event.data !== seen) {
+            location.reload();
+        }
+        seen = event.data;
+    };
+})();
+</script>
+""" % RELOAD_PATH
+
+
+class FileWatcher:
+    def __init__(self, directories=(), files=(), interval=WATCH_INTERVAL):
+        self.directories = list(directories)
+        self.files = list(files)
+        self.interval = interval
+        self._state = self.snapshot()
+
+    def snapshot(self):
+        """Map every watched path to (mtime, size); missing files are left out."""
+        state = {}
+        paths = list(self.files)
+        for directory in self.directories:
+            try:
+                paths.extend(entry.path for entry in os.scandir(directory) if entry.is_file())
+            except FileNotFoundError:
+                pass
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            state[os.path.normpath(path)] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def poll(self):
+        """Return the set of paths created, modified or deleted since the last poll."""
+        state = self.snapshot()
+        old = self._state
+        self._state = state
+        return {path for path in state.keys() | old.keys() if state.get(path) != old.get(path)}
+
+    def changes(self):
+        """Yield sets of changed paths, blocking between them."""
+        while True:
+            time.sleep(self.interval)
+            changed = self.poll()
+            if changed:
+                yield changed
+
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, server_state, **kwargs):
+        self.server_state = server_state
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == RELOAD_PATH:
+            self.send_events()
+            return
+        file_path = self.translate_path(path)
+        if os.path.isdir(file_path):
+            if not path.endswith("/"):
+                # Let the base class redirect so relative links resolve
+                super().do_GET()
+                return
+            file_path = os.path.join(file_path, "index.html")
+        if file_path.endswith(".html") and os.path.isfile(file_path):
+            self.send_html(file_path)
+            return
+        super().do_GET()
+
+    def send_html(self, file_path):
+        with open(file_path, 'rb') as f:
+            html = f.read()
+        index = html.rfind(b"</body>")
+        if index == -1:
+            index = len(html)
+        html = html[:index] + RELOAD_SCRIPT.encode("utf-8") + html[index:]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(html)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(html)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        state = self.server_state
+        generation = None
+        try:
+            while not state.closed:
+                with state.changed:
+                    if generation == state.generation:
+                        state.changed.wait(KEEPALIVE_SECONDS)
+                    current = state.generation
+                if current != generation:
+                    generation = current
+                    self.wfile.write(f"data: {state.build_id}-{generation}\n\n".encode("utf-8"))
+                else:
+                    self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_request(self, code='-', size='-'):
+        # Only report failed requests, not every asset
+        if str(getattr(code, "value", code)).startswith(("4", "5")):
+            super().log_request(code, size)
+
+
+class PreviewServer:
+    """Serve root on port in a background thread, pushing reloads to open pages."""
+
+    def __init__(self, root, port=8000, host="127.0.0.1"):
+        self.changed = threading.Condition()
+        self.generation = 0
+        self.closed = False
+        # Distinguishes this server from a restarted one, whose generations start again at 0
+        self.build_id = f"{os.getpid()}.{time.time_ns()}"
+        handler = functools.partial(PreviewHandler, server_state=self, directory=os.fspath(root))
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}/"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def reload(self):
+        """Tell every open page to reload."""
+        with self.changed:
+            self.generation += 1
+            self.changed.notify_all()
+
+    def close(self):
+        with self.changed:
+            self.closed = True
+            self.changed.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
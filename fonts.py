@@ -0,0 +1,200 @@
+"""
+Subsetted WOFF2 web fonts.
+
+The stylesheet's @font-face rules pointed at full Jost TTFs (about 60 KB
+each, with every glyph the family has). build_fonts() scans the site's
+HTML pages for the characters they actually show, then writes a WOFF2
+copy of each font the stylesheet declares, holding only those glyphs,
+into fonts/woff2/ and rewrites the rules to use it:
+
+    @font-face {
+        font-family: 'Jost-Regular';
+        src: url('../fonts/woff2/Jost-Regular.woff2') format('woff2'), url('../fonts/Jost-Regular.ttf') format('truetype');
+    }
+
+The full TTF stays as the fallback source, and the other weights in
+fonts/, which no rule declares, are left out. Printable ASCII is always
+kept so text that scripts insert still has its glyphs. .cache/fonts.json
+stores a hash of the characters each font has glyphs for, the source
+font and the subsetting options for each output, so a font is only
+subset again when its set of used glyphs changes (or with --force).
+
+    python build.py fonts [--root .] [--force]
+
+Needs fontTools and brotli (pip install fonttools brotli); without them
+the stylesheet is left as it is.
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+from html.parser import HTMLParser
+
+import output_writer
+import profiling
+
+STYLESHEET_PATH = "samuelhp_files/styles.css"
+# Subsets go in this directory next to their source font
+SUBSET_DIR = "woff2"
+FONT_CACHE_PATH = "./.cache/fonts.json"
+# Always kept: space to tilde, and the no-break space HTML entities produce
+BASE_CODEPOINTS = set(range(0x20, 0x7F)) | {0xA0}
+# Bump when the subsetting options change, so existing subsets are rebuilt
+SUBSET_VERSION = 1
+
+FONT_FACE_RE = re.compile(r'@font-face\s*\{[^}]*\}')
+SRC_RE = re.compile(r'(\bsrc\s*:)[^;}]*')
+FONT_URL_RE = re.compile(r'''url\(\s*(["']?)([^"')]*\.(?:ttf|otf))\1\s*\)''')
+
+
+class TextCollector(HTMLParser):
+    """Collects the characters of a page's visible text (everything outside <script> and <style>)."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.codepoints = set()
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.codepoints.update(map(ord, data))
+
+
+def used_codepoints(root, pages):
+    """Codepoints of the text on the given pages, plus BASE_CODEPOINTS."""
+    codepoints = set(BASE_CODEPOINTS)
+    for page in pages:
+        collector = TextCollector()
+        with profiling.timed("io", f"read {page}"), open(os.path.join(root, page), 'r', encoding='utf-8') as f:
+            collector.feed(f.read())
+        collector.close()
+        codepoints |= collector.codepoints
+    # Control characters (newlines, tabs) are never drawn
+    return sorted(codepoint for codepoint in codepoints if codepoint >= 0x20)
+
+def declared_fonts(css):
+    """Site-relative paths (from the stylesheet's directory) of the TTF/OTF sources in its @font-face rules."""
+    fonts = []
+    for rule in FONT_FACE_RE.finditer(css):
+        match = FONT_URL_RE.search(rule.group(0))
+        if match and match.group(2) not in fonts:
+            fonts.append(match.group(2))
+    return fonts
+
+def woff2_url(font_url):
+    """URL of the WOFF2 subset of font_url, relative to the stylesheet like font_url itself."""
+    directory, name = posixpath.split(font_url)
+    return posixpath.join(directory, SUBSET_DIR, posixpath.splitext(name)[0] + ".woff2")
+
+def rewrite_font_faces(css):
+    """Point each @font-face rule at the WOFF2 subset, keeping the full font as the fallback source."""
+    def rewrite_rule(rule):
+        text = rule.group(0)
+        match = FONT_URL_RE.search(text)
+        if match is None:
+            return text
+        font_url = match.group(2)
+        fallback_format = "opentype" if font_url.endswith(".otf") else "truetype"
+        src = f"url('{woff2_url(font_url)}') format('woff2'), url('{font_url}') format('{fallback_format}')"
+        return SRC_RE.sub(lambda m: f"{m.group(1)} {src}", text, count=1)
+    return FONT_FACE_RE.sub(rewrite_rule, css)
+
+
+def covered_codepoints(font_path, codepoints):
+    """The codepoints that the font at font_path has glyphs for."""
+    from fontTools.ttLib import TTFont
+    with TTFont(font_path, lazy=True) as font:
+        cmap = font.getBestCmap()
+    return [codepoint for codepoint in codepoints if codepoint in cmap]
+
+def subset_key(font_path, codepoints):
+    digest = hashlib.sha256(json.dumps([SUBSET_VERSION, codepoints]).encode("utf-8"))
+    with open(font_path, 'rb') as f:
+        digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+def subset_font(font_path, out_path, codepoints):
+    """Write the glyphs font_path has for codepoints, with its layout features, as WOFF2. Returns the size."""
+    from fontTools import subset
+    options = subset.Options()
+    options.flavor = "woff2"
+    # TrueType hinting only helps at small sizes on old Windows rasterizers
+    options.hinting = False
+    options.desubroutinize = True
+    with profiling.timed("fonts", f"subset {os.path.basename(font_path)}"):
+        font = subset.load_font(font_path, options)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=codepoints)
+        subsetter.subset(font)
+        tmp_path = f"{out_path}.{os.getpid()}.tmp"
+        subset.save_font(font, tmp_path, options)
+        font.close()
+    with open(tmp_path, 'rb') as f:
+        data = f.read()
+    os.remove(tmp_path)
+    output_writer.write_bytes(out_path, data)
+    return len(data)
+
+def load_font_cache(cache_path=FONT_CACHE_PATH):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def build_fonts(root=".", stylesheet=STYLESHEET_PATH, cache_path=FONT_CACHE_PATH, force=False):
+    """Subset the stylesheet's fonts to the characters the site's pages use and point it at the WOFF2 files."""
+    try:
+        import brotli  # noqa: F401 (fontTools needs it to write WOFF2)
+        from fontTools import subset  # noqa: F401
+    except ImportError:
+        print("\t ! fontTools or brotli is not installed, fonts are not subset (pip install fonttools brotli)")
+        return
+
+    import assets
+    pages = [path for path in assets.site_files(root, os.path.join(root, assets.DIST_DIR)) if path.endswith(".html")]
+    codepoints = used_codepoints(root, pages)
+    stylesheet_path = os.path.join(root, stylesheet)
+    with open(stylesheet_path, 'r', encoding='utf-8') as f:
+        css = f.read()
+    style_dir = posixpath.dirname(stylesheet)
+
+    cache = load_font_cache(cache_path)
+    new_cache = {}
+    for font_url in declared_fonts(css):
+        font_path = os.path.join(root, posixpath.normpath(posixpath.join(style_dir, font_url)))
+        out_path = os.path.join(root, posixpath.normpath(posixpath.join(style_dir, woff2_url(font_url))))
+        covered = covered_codepoints(font_path, codepoints)
+        key = subset_key(font_path, covered)
+        new_cache[out_path] = key
+        if not force and cache.get(out_path) == key and os.path.exists(out_path):
+            print(f"{os.path.basename(out_path)} up to date")
+            continue
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        size = subset_font(font_path, out_path, covered)
+        print(f"{os.path.basename(font_path)} ({os.path.getsize(font_path) / 1024:.0f} KB) -> {out_path} "
+              f"({size / 1024:.1f} KB, {len(covered)} characters)")
+
+    output_writer.write_text(stylesheet_path, rewrite_font_faces(css))
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(new_cache, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Subset the site's fonts to WOFF2.")
+    parser.add_argument("--root", default=".", help="site root (default: %(default)s)")
+    parser.add_argument("--force", action="store_true", help="subset every font, even if its characters have not changed")
+    args = parser.parse_args()
+    build_fonts(args.root, force=args.force)
@@ -1,156 +1,58 @@
-import requests
-import re
 from pathlib import Path
 import sys
 import os
-import markdown
-
-# Register the custom Asa lexer
-from asa_lexer import AsaLexer
-from pygments import lexers
-
-# Import custom horizontal rule extension
-from hr_preprocessor import HorizontalRuleExtension
-
-# Import custom inline note extension
-from inline_note_preprocessor import InlineNoteExtension
-
-# Register the lexer class
-def get_asa_lexer():
-    return AsaLexer
-
-# Patch the get_lexer_by_name function to handle 'asa'
-original_get_lexer_by_name = lexers.get_lexer_by_name
-def patched_get_lexer_by_name(name, **options):
-    if name == 'asa':
-        return AsaLexer(**options)
-    return original_get_lexer_by_name(name, **options)
-lexers.get_lexer_by_name = patched_get_lexer_by_name
-
-
-def get_readme_image_url(content):
-    # find an image that is manually set for use in blog with class="blog"
-    match = re.search(r'class\s*=\s*"blog"\s*src\s*=\s*"(.+?)"', content)
-    # If not found, look for images using markdown
-    if not match:
-        match = re.search(r'!\[.*?\]\((.*?)\)', content)
-    # If not found, look for images using img tags
-    if not match:
-        match = re.search(r'src\s*=\s*"(.+?)"', content)
-    if not match:
-        return None
-    url = match.group(1).strip()
-    if url.startswith("http://") or url.startswith("https://"):
-        # Absolute URL, use as-is
-        print(f"Image: {url}")
-        return url
-    else:
-        return url
-
-def convert_post_to_string(post):
-    o = ""
-    for line in post.split("\n"):
-        if line.startswith("#"):
-            o+= line.split("#")[-1]
-        elif line.startswith("<"):
-            continue
-        else:
-            o+=line+"\n"
-    return o
-
-def extract_description_from_html(html_content, max_chars=256):
-    """Extract text from <p> tags that are direct children of blog-body div."""
-    # Find the blog-body div
-    start_match = re.search(r'<div class="blog-body">', html_content)
-    if not start_match:
-        return ""
-
-    # Extract everything from blog-body to </body> (since blog-body div isn't closed)
-    start_pos = start_match.end()
-    end_match = re.search(r'</body>', html_content[start_pos:])
-    if not end_match:
-        return ""
-
-    blog_content = html_content[start_pos:start_pos + end_match.start()]
-
-    # Now extract direct <p> children only
-    text = ""
-    depth = 0
-    i = 0
-
-    while i < len(blog_content):
-        if blog_content[i] == '<':
-            tag_match = re.match(r'<(\w+)[^>]*>', blog_content[i:])
-            if tag_match:
-                tag_name = tag_match.group(1).lower()
-
-                # Track depth for non-paragraph tags
-                if tag_name not in ['p', 'br', 'img', 'hr']:
-                    depth += 1
-                    i += len(tag_match.group(0))
-                    continue
-
-                # Found a <p> tag at depth 0 (direct child)
-                if tag_name == 'p' and depth == 0:
-                    # Extract the full <p>...</p> content
-                    p_match = re.match(r'<p>(.*?)</p>', blog_content[i:], re.DOTALL)
-                    if p_match:
-                        p_content = p_match.group(1)
-
-                        # Check if this <p> only directly contains tags (no text outside tags)
-                        # This matches content that is entirely wrapped in tags: ^\s*<.+>\s*$
-                        # E.g., "<title>...</title>" or "<img src='...'>" but not "text <title>...</title>"
-                        only_contains_tags = bool(re.match(r'^\s*<.+>\s*$', p_content, re.DOTALL))
-
-                        # Skip this <p> if it only contains tags with no direct text
-                        if only_contains_tags:
-                            i += len(p_match.group(0))
-                            continue
-
-                        # Remove any HTML tags within the <p>
-                        clean_text = re.sub(r'<[^>]+>', '', p_content)
-                        # Decode HTML entities
-                        clean_text = clean_text.replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&')
-                        clean_text = clean_text.strip()
-
-                        if clean_text:
-                            text += clean_text + "\n"
-                            if len(text) >= max_chars:
-                                break
-
-                        i += len(p_match.group(0))
-                        continue
-
-            # Check for closing tags
-            close_match = re.match(r'</(\w+)>', blog_content[i:])
-            if close_match:
-                tag_name = close_match.group(1).lower()
-                if tag_name not in ['p', 'br', 'img', 'hr']:
-                    depth = max(0, depth - 1)
-                i += len(close_match.group(0))
-                continue
-
-        i += 1
-
-    return text[:max_chars].strip()
-
-
-def convert_markdown_with_css(markdown_file, css_file, output_file):
-        with open(markdown_file, 'r', encoding='utf-8') as f:
-            markdown_text = f.read()
-
-        html_body = markdown.markdown(
-            markdown_text,
-            extensions=['fenced_code', 'codehilite', 'pymdownx.inlinehilite', 'pymdownx.details', 'toc', 'extra', 'admonition', 'nl2br', InlineNoteExtension(), HorizontalRuleExtension()],
-            extension_configs={
-                'codehilite': {
-                    'guess_lang': False
-                }
-            }
-        )
-
-        # Create the full HTML structure with a link to the CSS file
-        full_html = f"""
+import posixpath
+import json
+import hashlib
+import re
+import time
+
+import output_writer
+import profiling
+
+# The Markdown pipeline (markdown, pymdownx, pygments) is imported only when
+# a post actually has to be rendered, so up-to-date builds start quickly
+
+# Incremental build manifest: a post is only re-rendered when its source or
+# one of the pipeline inputs below has changed since the last build. Each
+# post's entry also holds the title/thumbnail/description captured while
+# rendering it, which is all the blog home page needs.
+MANIFEST_PATH = "./.cache/blog_manifest.json"
+EXTENSION_MODULES = ["markdown_converter.py", "line_scanner.py", "hr_preprocessor.py", "inline_note_preprocessor.py", "post_metadata.py", "asa_lexer.py"]
+PIPELINE_PACKAGES = ["markdown", "pymdown-extensions", "pygments"]
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    try:
+        with profiling.timed("io", "read manifest"), open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"pipeline": {}, "posts": {}}
+
+def save_manifest(manifest, manifest_path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with profiling.timed("io", "write manifest"), open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def get_pipeline_hashes(css_file):
+    """Hash everything besides the post source that affects a rendered post."""
+    module_dir = Path(__file__).resolve().parent
+    hashes = {name: hash_bytes((module_dir / name).read_bytes()) for name in EXTENSION_MODULES}
+    hashes["template"] = hash_bytes(POST_TEMPLATE.format(css_file=css_file, html_body="").encode("utf-8"))
+    # Not imported at the top: it is the slowest import an up-to-date build needs
+    from importlib import metadata
+    for package in PIPELINE_PACKAGES:
+        try:
+            hashes[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            hashes[package] = None
+    return hashes
+
+
+# Page template for a single post; hashed into the build manifest
+POST_TEMPLATE = """
         <!DOCTYPE html>
         <html lang="en">
         <head>
@@ -197,65 +99,116 @@ def convert_markdown_with_css(markdown_file, css_file, output_file):
         </html>
         """
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(full_html)
+def convert_markdown_with_css(markdown_file, css_file, output_file):
+        """Render a post to output_file and return its metadata."""
+        # Shared Markdown pipeline (registers the Asa lexer and custom extensions)
+        from markdown_converter import convert_with_metadata
 
-def convert_pages_to_html(source_path="./b_md", out_path="./b"):
-    import markdown
-    for file in os.listdir(source_path):
+        post_name = os.path.basename(markdown_file)
+        with profiling.timed("io", f"read {post_name}"), open(markdown_file, 'r', encoding='utf-8') as f:
+            markdown_text = f.read()
+
+        with profiling.timed("markdown", post_name):
+            html_body, post_metadata = convert_with_metadata(markdown_text)
+
+        # Create the full HTML structure with a link to the CSS file
+        full_html = POST_TEMPLATE.format(css_file=css_file, html_body=html_body)
+
+        # Only replaced if the page differs, so unchanged pages keep their mtime
+        output_writer.write_text(output_file, full_html)
+        return post_metadata
+
+def _init_render_worker(profile=False):
+    if profile:
+        profiling.start()
+    # Build the pipeline (and patched lexer lookup) once per worker process
+    from markdown_converter import get_converter
+    get_converter()
+
+def _render_post(job):
+    return convert_markdown_with_css(*job)
+
+def _render_post_in_worker(job):
+    # Send this post's timings and written files back with its metadata
+    return convert_markdown_with_css(*job), profiling.drain(), output_writer.drain()
+
+def render_posts(jobs, workers=1):
+    """Render (markdown_file, css_file, output_file) jobs, in a process pool when workers > 1.
+
+    Returns each post's metadata, in the order of jobs.
+    """
+    for markdown_file, _, _ in jobs:
+        print(f"Converting {os.path.basename(markdown_file)} to HTML...")
+    if workers > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_render_worker,
+                                 initargs=(profiling.active(),)) as executor:
+            # map() yields in submission order, so failures surface deterministically
+            results = []
+            for post_metadata, timings, changes in executor.map(_render_post_in_worker, jobs):
+                profiling.merge(timings)
+                output_writer.merge(changes)
+                results.append(post_metadata)
+            return results
+    return [_render_post(job) for job in jobs]
+
+def convert_pages_to_html(source_path="./b_md", out_path="./b", css_file="../samuelhp_files/styles.css", manifest_path=MANIFEST_PATH, force=False, workers=1):
+    manifest = load_manifest(manifest_path)
+    pipeline = get_pipeline_hashes(css_file)
+    if manifest.get("pipeline") != pipeline:
+        if manifest.get("posts"):
+            print("Build pipeline changed, rebuilding all posts...")
+        force = True
+
+    old_posts = manifest.get("posts", {})
+    posts = {}
+    skipped = 0
+    jobs = []
+    for file in sorted(os.listdir(source_path)):
         if file.endswith(".md"):
-            print(f"Converting {file} to HTML...")
-            convert_markdown_with_css(os.path.join(source_path, file),"../samuelhp_files/styles.css",os.path.join(out_path, file.replace(".md", ".html")))
-            #markdown.markdownFromFile(input=os.path.join(source_path, file), output=os.path.join(out_path, file.replace(".md", ".html")))
+            html_filename = file.replace(".md", ".html")
+            output_file = os.path.join(out_path, html_filename)
+            with open(os.path.join(source_path, file), 'rb') as f:
+                source_hash = hash_bytes(f.read())
+            previous = old_posts.get(file)
+            if not force and previous and previous["source"] == source_hash and os.path.exists(output_file):
+                posts[file] = previous
+                skipped += 1
+                continue
+            jobs.append((os.path.join(source_path, file), css_file, output_file))
+            posts[file] = {"source": source_hash, "output": html_filename}
+    for (markdown_file, _, _), post_metadata in zip(jobs, render_posts(jobs, workers)):
+        posts[os.path.basename(markdown_file)].update(post_metadata)
+
+    # Remove outputs of posts whose source has been deleted
+    for file, entry in old_posts.items():
+        if file not in posts:
+            stale_output = os.path.join(out_path, entry["output"])
+            if os.path.exists(stale_output):
+                print(f"Removing {entry['output']} (source deleted)")
+                output_writer.remove(stale_output)
+
+    save_manifest({"pipeline": pipeline, "posts": posts}, manifest_path)
+    if jobs:
+        # Only rendering adds to the highlight cache
+        from highlight_cache import get_highlight_cache
+        evicted = get_highlight_cache().prune()
+        if evicted:
+            print(f"Evicted {evicted} highlighted block(s) from the cache")
+    if skipped:
+        print(f"{skipped} post(s) up to date")
     print(f"DONE!\n")
 
-def generate_blog_home(style_path="./samuelhp_files/styles.css", source_path="./b_md", out_path="./b/"):
-    posts = []
-    for file in os.listdir(source_path):
-        if file.endswith(".md"):
-            with open(os.path.join(source_path, file)) as f:
-                posts.append((str(file),f.read()))
-
-    items = []
-    for filename,post in posts:
-        print(f"Adding {filename} to home...")
-        match = re.search(r'<title>(.+?)<\/title>', post)
-        if not match:
-            name = "Untitled"
-            print(f"\t ! No title found for {filename}")
-        else:
-            name = match.group(1).strip()
-        thumb_url = get_readme_image_url(post)
-        if not thumb_url:
-            thumb_url = "../placeholder.jpg"
-            print(f"\t ! No thumbnail found for {filename}")
-
-        # Read the HTML file for clean description text
-        html_filename = filename.replace(".md", ".html")
-        html_path = os.path.join(out_path, html_filename)
-        if os.path.exists(html_path):
-            with open(html_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            post_str = extract_description_from_html(html_content, max_chars=500)
-        else:
-            # Fallback to old method if HTML doesn't exist yet
-            post_str = convert_post_to_string(post)[:256]
+# Blog home page, written page by page: head, one block per post, then the tail
+BLOG_PAGE_SIZE = 24
+# Pages after the first go in page/<n>/index.html; posts are files directly in out_path, so never collide with it
+BLOG_PAGES_DIR = "page"
+# URLs that don't need adjusting when a page moves down a directory
+ABSOLUTE_URL_RE = re.compile(r'[a-zA-Z][a-zA-Z0-9+.-]*:|[/#]')
+# Rendered width of a card thumbnail (.blog-thumb img), for choosing among the srcset widths
+BLOG_THUMB_SIZES = "10vw"
 
-        block = f'''
-        <div class="blog-item">
-          <a href="{html_filename}" class="blog-container">
-            <div class="blog-thumb">
-              <img src="{thumb_url}" alt="{name} thumbnail"/>
-            </div>
-            <div class="blog-synopsis">
-                <div class="blog-title">{name}</div>
-                <div class="blog-description">{post_str}</div>
-            </div>
-          </a>
-        </div>
-        '''
-        items.append(block)
-    html = f'''
+BLOG_HOME_HEAD = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -270,11 +223,11 @@ def generate_blog_home(style_path="./samuelhp_files/styles.css", source_path="./
         <link rel="icon" type="image/png" sizes="16x16" href="../favicon-16x16.png">
         <link rel="manifest" href="../site.webmanifest">
       <style>
-      body {{
+      body {
           min-height: 100vh;
           overflow: auto;
           margin-bottom:40px;
-        }}
+        }
       </style>
     </head>
     <body style="overflow:auto; min-height:100vh;">
@@ -291,16 +244,209 @@ def generate_blog_home(style_path="./samuelhp_files/styles.css", source_path="./
                 </h1>
             </a>
           <div class="blog-grid">
-            {''.join(items)}
-          </div>
+            """
+
+BLOG_HOME_GRID_END = """
+          </div>"""
+
+BLOG_HOME_TAIL = """
         </div>
     </body>
     </html>
-    '''
-    print(f"DONE!\n")
-    Path(out_path+"/index.html").write_text(html, encoding="utf-8")
-    print(f"Blog generated: {out_path}/index.html\n")
+    """
+
+def blog_page_path(page):
+    """Path of a home page, relative to out_path."""
+    return "index.html" if page == 1 else posixpath.join(BLOG_PAGES_DIR, str(page), "index.html")
+
+def blog_page_prefix(page):
+    """What a URL relative to out_path needs in front of it to work from page."""
+    directory = posixpath.dirname(blog_page_path(page))
+    return posixpath.relpath(".", directory) + "/" if directory else ""
+
+def page_relative(url, prefix):
+    return url if not prefix or ABSOLUTE_URL_RE.match(url) else prefix + url
+
+def blog_home_head(prefix=""):
+    # The head's links are written relative to out_path
+    return BLOG_HOME_HEAD.replace('="../', f'="{prefix}../')
+
+def parse_post_date(filename, value):
+    """Parse a post's date metadata into a naive UTC datetime, or None."""
+    if not value:
+        return None
+    from datetime import datetime, timezone
+    try:
+        date = datetime.fromisoformat(value)
+    except ValueError:
+        print(f"\t ! Unrecognised date {value!r} in {filename}, listing it with the undated posts")
+        return None
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+def sort_posts(posts):
+    """Order manifest entries for the home page: newest first, then undated posts by filename."""
+    dated = []
+    undated = []
+    for filename, post in sorted(posts.items()):
+        date = parse_post_date(filename, post.get("date"))
+        if date is None:
+            undated.append((filename, post))
+        else:
+            dated.append((date, filename, post))
+    # sort() is stable, so posts sharing a date stay in filename order
+    dated.sort(key=lambda item: item[0], reverse=True)
+    return [(filename, post) for _, filename, post in dated] + undated
+
+def blog_item_html(filename, post, thumbs=None, out_path="./b/", prefix=""):
+    name = post.get("title")
+    if not name:
+        name = "Untitled"
+        print(f"\t ! No title found for {filename}")
+    thumb_url = post.get("thumb")
+    if not thumb_url:
+        thumb_url = "../placeholder.jpg"
+        print(f"\t ! No thumbnail found for {filename}")
+    html_filename = page_relative(post["output"], prefix)
+    post_str = post.get("description", "")
+    if thumbs is not None:
+        from thumbnails import picture_html
+        # The source is found relative to out_path, the links are relative to the page
+        variants = thumbs.variants(thumb_url, base_dir=out_path)
+        thumb_html = picture_html(page_relative(thumb_url, prefix), f"{name} thumbnail", variants, BLOG_THUMB_SIZES,
+                                  prefix + os.path.relpath(thumbs.out_dir, out_path).replace(os.sep, "/"))
+    else:
+        thumb_html = f'<img src="{page_relative(thumb_url, prefix)}" alt="{name} thumbnail"/>'
 
-convert_pages_to_html()
-generate_blog_home()
-#generate_portfolio("sam-astro", sys.argv)
+    return f'''
+        <div class="blog-item">
+          <a href="{html_filename}" class="blog-container">
+            <div class="blog-thumb">
+              {thumb_html}
+            </div>
+            <div class="blog-synopsis">
+                <div class="blog-title">{name}</div>
+                <div class="blog-description">{post_str}</div>
+            </div>
+          </a>
+        </div>
+        '''
+
+def blog_page_link(page, target):
+    """Relative link from one home page to another."""
+    return blog_page_prefix(page) + blog_page_path(target)
+
+def blog_pages_nav_html(page, page_count):
+    newer = f'<a href="{blog_page_link(page, page - 1)}" class="blog-page-link" rel="prev">&larr; Newer</a>' if page > 1 else ""
+    older = f'<a href="{blog_page_link(page, page + 1)}" class="blog-page-link" rel="next">Older &rarr;</a>' if page < page_count else ""
+    return f'''
+          <div class="blog-pages">
+            {newer}
+            <span class="blog-page-number">Page {page} of {page_count}</span>
+            {older}
+          </div>'''
+
+def generate_blog_home(style_path="./samuelhp_files/styles.css", source_path="./b_md", out_path="./b/", manifest_path=MANIFEST_PATH, page_size=BLOG_PAGE_SIZE, thumbnails=True, offline=False):
+    """Write the blog home page as index.html, page/2/index.html, ... with page_size posts on each.
+
+    With thumbnails, cards link resized variants of each post's image (see thumbnails.py).
+    Offline, remote images are not fetched; cards use the variants already made, if any.
+    """
+    # Everything shown on the home page was captured when the posts were rendered
+    posts = load_manifest(manifest_path).get("posts", {})
+    for file in sorted(os.listdir(source_path)):
+        if file.endswith(".md") and file not in posts:
+            print(f"\t ! {file} has not been converted yet, skipping")
+
+    ordered = sort_posts(posts)
+    thumbs = None
+    if thumbnails:
+        from thumbnails import get_thumbnail_cache
+        thumbs = get_thumbnail_cache(offline=offline)
+    page_count = max(1, -(-len(ordered) // page_size))
+    for page in range(1, page_count + 1):
+        page_path = os.path.join(out_path, blog_page_path(page))
+        prefix = blog_page_prefix(page)
+        os.makedirs(os.path.dirname(page_path), exist_ok=True)
+        # Each post's block goes straight to the file, so only one page is ever open
+        with profiling.timed("io", f"write {blog_page_path(page)}"), output_writer.open_text(page_path) as f:
+            f.write(blog_home_head(prefix))
+            for filename, post in ordered[(page - 1) * page_size:page * page_size]:
+                print(f"Adding {filename} to home...")
+                f.write(blog_item_html(filename, post, thumbs, out_path, prefix))
+            f.write(BLOG_HOME_GRID_END)
+            if page_count > 1:
+                f.write(blog_pages_nav_html(page, page_count))
+            f.write(BLOG_HOME_TAIL)
+    if thumbs is not None:
+        thumbs.save()
+
+    # Remove pages left over from a build with more posts; nothing outside page/<n>/ is touched
+    pages_dir = os.path.join(out_path, BLOG_PAGES_DIR)
+    for name in sorted(os.listdir(pages_dir)) if os.path.isdir(pages_dir) else []:
+        page_path = os.path.join(pages_dir, name, "index.html")
+        if name.isdigit() and int(name) > page_count and os.path.isfile(page_path):
+            print(f"Removing {blog_page_path(int(name))} (no longer needed)")
+            output_writer.remove(page_path)
+            for directory in (os.path.dirname(page_path), pages_dir):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    # Not empty: something else is in there, or later pages are still in use
+                    break
+    print(f"DONE!\n")
+    if page_count > 1:
+        print(f"Blog generated: {out_path}/index.html ({page_count} pages of up to {page_size} posts)\n")
+    else:
+        print(f"Blog generated: {out_path}/index.html\n")
+
+def watch_blog(source_path="./b_md", out_path="./b", css_file="../samuelhp_files/styles.css", style_path="./samuelhp_files/styles.css", port=None, offline=False,
+               page_size=BLOG_PAGE_SIZE, thumbnails=True):
+    """Rebuild changed posts and the home page on every save, optionally serving a live preview on port.
+
+    page_size, thumbnails and offline are passed to generate_blog_home(), as in a one-shot build.
+    """
+    from devserver import FileWatcher, PreviewServer
+    from markdown_converter import get_converter
+
+    module_dir = Path(__file__).resolve().parent
+    modules = {os.path.normpath(module_dir / name) for name in EXTENSION_MODULES}
+    # Keep the pipeline warm; rendering happens in this process from now on
+    get_converter()
+    convert_pages_to_html(source_path, out_path, css_file)
+    generate_blog_home(style_path, source_path, out_path, page_size=page_size, thumbnails=thumbnails,
+                       offline=offline)
+
+    server = None
+    if port is not None:
+        server = PreviewServer(module_dir, port)
+        print(f"Previewing at {server.url}{os.path.relpath(out_path, module_dir)}/")
+    watcher = FileWatcher([source_path], sorted(modules) + [style_path])
+    print(f"Watching {source_path}, the extension modules and {style_path} (Ctrl+C to stop)\n")
+    try:
+        for changed in watcher.changes():
+            if changed & modules:
+                # The imported pipeline is stale; start over in a fresh interpreter
+                print("Extension modules changed, restarting...")
+                if server:
+                    server.close()
+                os.execv(sys.executable, [sys.executable] + sys.argv)
+            start = time.perf_counter()
+            if any(path.endswith(".md") for path in changed):
+                convert_pages_to_html(source_path, out_path, css_file)
+                generate_blog_home(style_path, source_path, out_path, page_size=page_size, thumbnails=thumbnails,
+                                   offline=offline)
+            print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+            if server:
+                server.reload()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server:
+            server.close()
+
+if __name__ == "__main__":
+    # Same options as `python build.py blog`, which owns the command line
+    import build
+    build.main(["blog"] + sys.argv[1:])
@@ -1,18 +1,41 @@
 import requests
 import re
-from pathlib import Path
 import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from http_cache import HttpCache, HTTP_CACHE_DIR
+from rate_limit import RequestScheduler
+from thumbnails import get_thumbnail_cache, THUMBNAIL_DIR
+import output_writer
+import profiling
 
 GITHUB_API = "https://api.github.com"
+# Upper bound on concurrent GitHub requests (and pooled connections)
+MAX_WORKERS = 8
+
+def create_session(pool_size=MAX_WORKERS):
+    """Session with a connection pool large enough for MAX_WORKERS threads, so TLS connections are reused."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def fetch(session, url, headers, cache=None):
+    """GET url, through the on-disk response cache when one is given."""
+    if cache is not None:
+        return cache.get(session, url, headers)
+    return session.get(url, headers=headers)
 
-def get_repositories(username, token):
+def get_repositories(username, token, session=requests, cache=None):
     repos_url = f"{GITHUB_API}/users/{username}/repos?per_page=100"
     headers = {}
     if token != None:
         headers = {'Authorization': 'Bearer ' + token, 'X-GitHub-Api-Version': '2022-11-28'}
     repos = {"username":username, "repos":[]}
     while repos_url:
-        r = requests.get(repos_url, headers=headers)
+        r = fetch(session, repos_url, headers, cache)
         if r.status_code != 200:
             print(f"Error getting repositories for user: {username}")
         r.raise_for_status()
@@ -21,21 +44,23 @@ def get_repositories(username, token):
         repos_url = r.links.get('next', {}).get('url')
     return repos
 
-def get_readme_image_url(owner, token, repo, branch="main"):
-    """Fetch README raw content and extract first image URL, resolving relative and absolute paths."""
-    readme_url = f"https://api.github.com/repos/{owner}/{repo}/readme"
+def get_readme_image_url(owner, token, repo, branch="main", session=requests, cache=None):
+    """Fetch README raw content and extract its first image URL."""
+    readme_url = f"{GITHUB_API}/repos/{owner}/{repo}/readme"
     headers = {'Accept': 'application/vnd.github.raw+json', 'X-GitHub-Api-Version': '2022-11-28'}
     if token != None:
         headers['Authorization'] = 'Bearer ' + token
-    r = requests.get(readme_url, headers=headers)
+    r = fetch(session, readme_url, headers, cache)
     if r.status_code != 200:
         print(f"Error getting readme for {repo}")
         print(f"\t >  status code: {r.status_code}")
         print(f"\t >  text: {r.text}")
         print(f"\t >  url: {readme_url}")
-        print(f"\t >  headers: {headers}")
         return None
-    content = r.text
+    return extract_readme_image_url(r.text, owner, repo, branch)
+
+def extract_readme_image_url(content, owner, repo, branch="main"):
+    """Extract the first image URL from README content, resolving relative and absolute paths."""
     # find an image that is manually set for use in portfolio with class="portfolio"
     match = re.search(r'class\s*=\s*"portfolio"\s*src\s*=\s*"(.+?)"', content)
     # If not found, look for images using markdown
@@ -55,30 +80,128 @@ def get_readme_image_url(owner, token, repo, branch="main"):
         # Relative or GitHub repo-rooted path (starting with '/')
         # Normalize path by stripping leading '/'
         url = url.lstrip('/')
-        # Construct the raw URL to this file on main branch
+        # Construct the raw URL to this file on the default branch
         url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/" + url
         print(f"Image: {url}")
         return url
 
+def fetch_repositories(usernames, token, session, max_workers=MAX_WORKERS, cache=None):
+    """Fetch every user's repository listing concurrently, returned in the order of usernames."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda u: get_repositories(u, token, session, cache), usernames))
+
+def fetch_readme_image_urls(repos, token, session, max_workers=MAX_WORKERS, cache=None):
+    """Fetch README thumbnails for repos concurrently, returned in the order of repos."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda r: get_readme_image_url(r["username"], token, r["name"], r.get("default_branch") or "main", session, cache), repos))
 
-def generate_portfolio(username, args, style_path="./samuelhp_files/styles.css", out_path="portfolio.html"):
-    token = None
-    if len(args)>1:
-        token = args[1]
-        print("Using token: " + token)
+
+# GraphQL backend: repo metadata and README text for all owners in a few
+# batched queries, instead of one REST call per page plus one per README
+GRAPHQL_PAGE_SIZE = 100
+# Rendered width of a card thumbnail (.portfolio-thumb img), for choosing among the srcset widths
+PORTFOLIO_THUMB_SIZES = "220px"
+# GraphQL can't ask for "the README" like REST's /readme does, so try the usual names
+README_NAMES = ["README.md", "readme.md", "Readme.md", "README.markdown", "README.rst", "README.txt", "README"]
+
+def build_graphql_query(count):
+    """Query repositories for `count` owners at once, aliased o0..o{count-1}."""
+    readmes = "\n".join(f'        readme{i}: object(expression: "HEAD:{name}") {{ ... on Blob {{ text }} }}'
+                        for i, name in enumerate(README_NAMES))
+    params = ", ".join(f"$login{i}: String!, $after{i}: String" for i in range(count))
+    owners = "\n".join(f'''  o{i}: repositoryOwner(login: $login{i}) {{
+    repositories(first: {GRAPHQL_PAGE_SIZE}, after: $after{i}, privacy: PUBLIC, ownerAffiliations: OWNER, orderBy: {{field: NAME, direction: ASC}}) {{
+      pageInfo {{ hasNextPage endCursor }}
+      nodes {{
+        name
+        description
+        stargazerCount
+        isFork
+        url
+        defaultBranchRef {{ name }}
+{readmes}
+      }}
+    }}
+  }}''' for i in range(count))
+    return f"query({params}) {{\n{owners}\n}}"
+
+def graphql_repo_to_rest(node):
+    """Map a GraphQL repository node onto the REST fields generate_portfolio() uses."""
+    readme = None
+    for i in range(len(README_NAMES)):
+        blob = node.get(f"readme{i}")
+        if blob and blob.get("text") is not None:
+            readme = blob["text"]
+            break
+    return {
+        "name": node["name"],
+        "description": node["description"],
+        "stargazers_count": node["stargazerCount"],
+        "fork": node["isFork"],
+        "html_url": node["url"],
+        "default_branch": (node.get("defaultBranchRef") or {}).get("name") or "main",
+        "readme": readme,
+    }
+
+def fetch_repositories_graphql(usernames, token, session, cache=None):
+    """Fetch every owner's repositories, including README text, in batched GraphQL queries."""
+    graphql_url = f"{GITHUB_API}/graphql"
+    headers = {'Authorization': 'Bearer ' + token}
+    userRepos = [{"username": username, "repos": []} for username in usernames]
+    # Owners that still have pages left, with the cursor to continue from
+    pending = {i: None for i in range(len(usernames))}
+    while pending:
+        owners = list(pending)
+        variables = {}
+        for n, i in enumerate(owners):
+            variables[f"login{n}"] = usernames[i]
+            variables[f"after{n}"] = pending[i]
+        body = {"query": build_graphql_query(len(owners)), "variables": variables}
+        r = cache.post(session, graphql_url, body, headers) if cache is not None else session.post(graphql_url, json=body, headers=headers)
+        if r.status_code != 200:
+            print(f"Error querying repositories for: {', '.join(usernames[i] for i in owners)}")
+        r.raise_for_status()
+        result = r.json()
+        data = result.get("data") or {}
+        for error in result.get("errors", []):
+            print(f"\t >  GraphQL error: {error.get('message')}")
+        pending = {}
+        for n, i in enumerate(owners):
+            owner = data.get(f"o{n}")
+            if owner is None:
+                raise RuntimeError(f"GraphQL query returned no data for {usernames[i]}")
+            page = owner["repositories"]
+            userRepos[i]["repos"].extend(graphql_repo_to_rest(node) for node in page["nodes"])
+            if page["pageInfo"]["hasNextPage"]:
+                pending[i] = page["pageInfo"]["endCursor"]
+    return userRepos
+
+
+def generate_portfolio(username, token=None, style_path="./samuelhp_files/styles.css", out_path="portfolio.html", max_workers=MAX_WORKERS, cache_dir=HTTP_CACHE_DIR, offline=False, backend="rest", thumbnails=True):
+    if token is not None:
+        print("Using token")
     else:
         print("NO TOKEN PROVIDED")
     
-    userRepos = []
+    # All requests go through the scheduler, which paces them and retries rate-limited/failed ones
+    http_session = create_session(max_workers)
+    session = RequestScheduler(http_session, max_concurrency=max_workers)
+    # Responses are cached on disk and revalidated with ETags; offline builds use the cache only
+    cache = HttpCache(cache_dir, offline=offline) if cache_dir else None
+    if offline:
+        print("OFFLINE: building from cached responses")
 
-    repos = get_repositories(username, token)
-    userRepos.append(repos)
+    if backend == "graphql" and token is None:
+        print("GraphQL backend requires a token, using REST")
+        backend = "rest"
 
-    # Manual repos
-    repos = get_repositories("The-Distributed-Computing-Project", token)
-    userRepos.append(repos)
-    repos = get_repositories("Asa-Programming-Language", token)
-    userRepos.append(repos)
+    # User's own repos, then manual repos
+    usernames = [username, "The-Distributed-Computing-Project", "Asa-Programming-Language"]
+    with profiling.timed("stage", "fetch repositories"):
+        if backend == "graphql":
+            userRepos = fetch_repositories_graphql(usernames, token, session, cache)
+        else:
+            userRepos = fetch_repositories(usernames, token, session, max_workers, cache)
 
     starsOffset = {"vault":50, "LMark":20, "CPP-Key-Logger":-100, "AetherGrid":30, "Asa":200}
     hiddenRepos = {"TPT-Biological-Mod", "RedditMaker"}
@@ -92,26 +215,46 @@ def generate_portfolio(username, args, style_path="./samuelhp_files/styles.css",
             allRepos.append(r)
     allRepos.sort(key=lambda r: r.get('stargazers_count', 0) + (starsOffset[r["name"]] if r["name"] in starsOffset else 0), reverse=True)
 
+    # Skip hidden repos and repos without a description before fetching their READMEs
+    allRepos = [r for r in allRepos if r.get('description') and r["name"] not in hiddenRepos]
+    if backend == "graphql":
+        # README text came back with the repo metadata
+        thumbUrls = [extract_readme_image_url(r["readme"], r["username"], r["name"], r["default_branch"]) if r["readme"] is not None else None
+                     for r in allRepos]
+    else:
+        with profiling.timed("stage", "fetch readmes"):
+            thumbUrls = fetch_readme_image_urls(allRepos, token, session, max_workers, cache)
+
+    # README images are resized into small cached variants instead of hotlinking the originals.
+    # They are not GitHub API calls, so they skip the API scheduler.
+    thumbs = get_thumbnail_cache(session=http_session, offline=offline) if thumbnails else None
+    thumbs_url = os.path.relpath(THUMBNAIL_DIR, os.path.dirname(out_path) or ".").replace(os.sep, "/")
+    def thumbnail_html(repo, thumb_url):
+        alt = f"{repo['name']} thumbnail"
+        if not thumb_url:
+            return None
+        if thumbs is None:
+            return f'<img src="{thumb_url}" alt="{alt}"/>'
+        return thumbs.img_html(thumb_url, alt, PORTFOLIO_THUMB_SIZES, url_prefix=thumbs_url)
+    with profiling.timed("stage", "thumbnails"), ThreadPoolExecutor(max_workers=max_workers) as executor:
+        thumbImages = list(executor.map(thumbnail_html, allRepos, thumbUrls))
+    if thumbs is not None:
+        thumbs.save()
+
     items = []
-    for repo in allRepos:
-        username = repo["username"]
+    for repo, thumb_image in zip(allRepos, thumbImages):
         name = repo['name']
         desc = repo.get('description', '')
         stars = repo.get('stargazers_count', 0)
         html_url = repo['html_url']
-        thumb_url = get_readme_image_url(username, token, name)
-        if not thumb_url:
+        if not thumb_image:
             thumbnail_image = ""
         else:
             thumbnail_image = f'''
                 <div class="portfolio-thumb">
-                  <img src="{thumb_url}" alt="{name} thumbnail"/>
+                  {thumb_image}
                 </div>
             '''
-        if not desc:
-            continue
-        if name in hiddenRepos:
-            continue
         block = f'''
         <div class="portfolio-item">
           <a href="{html_url}" target="_blank">
@@ -171,8 +314,12 @@ def generate_portfolio(username, args, style_path="./samuelhp_files/styles.css",
     </body>
     </html>
     '''
-    Path(out_path).write_text(html, encoding="utf-8")
+    output_writer.write_text(out_path, html)
     print(f"Portfolio generated: {out_path}")
 
 
-generate_portfolio("sam-astro", sys.argv)
+if __name__ == "__main__":
+    offline = "--offline" in sys.argv
+    backend = "graphql" if "--graphql" in sys.argv else "rest"
+    args = [a for a in sys.argv if a not in ("--offline", "--graphql")]
+    generate_portfolio("sam-astro", args[1] if len(args) > 1 else None, offline=offline, backend=backend)
@@ -0,0 +1,137 @@
+"""
+Disk-backed cache of Pygments-highlighted code blocks.
+
+Highlighting fenced code is most of the work of rendering a code-heavy
+post, and it is repeated on every rebuild even when only the prose
+changed. install() wraps codehilite's CodeHilite.hilite(), which both the
+fenced_code and codehilite extensions go through, so each block is looked
+up by a key built from:
+
+- the language (and whether a shebang line may pick it)
+- the Pygments and Markdown versions, since Pygments' HtmlFormatter writes
+  the token markup and codehilite the wrapper around it
+- the hash of asa_lexer.py when the Asa lexer may be used
+- the formatter options
+- the hash of the code itself
+
+Entries are plain HTML files. Reading an entry refreshes its mtime, and
+prune() evicts the least recently used entries once the cache is larger
+than max_bytes.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import markdown
+import pygments
+from markdown.extensions import codehilite
+
+import profiling
+
+HIGHLIGHT_CACHE_DIR = "./.cache/highlight"
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+ASA_LEXER_HASH = hashlib.sha256((Path(__file__).resolve().parent / "asa_lexer.py").read_bytes()).hexdigest()
+
+
+class HighlightCache:
+    def __init__(self, cache_dir=HIGHLIGHT_CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key(self, highlighter, shebang):
+        lang = highlighter.lang
+        lexer_version = f"{pygments.__version__}+{markdown.__version__}"
+        if lang is None or lang.lower() == 'asa':
+            # A shebang line may still select any lexer, including Asa
+            lexer_version += f"+{ASA_LEXER_HASH}"
+        formatter = highlighter.pygments_formatter
+        if not isinstance(formatter, str):
+            formatter = f"{formatter.__module__}.{formatter.__qualname__}"
+        options = [
+            lang, shebang, highlighter.guess_lang, highlighter.use_pygments, highlighter.lang_prefix,
+            formatter, repr(sorted(highlighter.options.items())),
+            hashlib.sha256(highlighter.src.encode("utf-8")).hexdigest(),
+        ]
+        return lexer_version + ":" + hashlib.sha256(json.dumps(options).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".html")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                html = f.read()
+        except FileNotFoundError:
+            return None
+        # Mark as recently used for prune()
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return html
+
+    def put(self, key, html):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Several render workers may write the same entry at once
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+
+    def prune(self):
+        """Evict least recently used entries until the cache fits in max_bytes. Returns the number evicted."""
+        entries = []
+        total = 0
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        for bucket in os.scandir(self.cache_dir):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            evicted += 1
+        return evicted
+
+
+_cache = None
+original_hilite = codehilite.CodeHilite.hilite
+
+def cached_hilite(self, shebang=True):
+    language = self.lang or "(guessed)"
+    key = _cache.key(self, shebang)
+    with profiling.timed("highlight cached", language):
+        html = _cache.get(key)
+    if html is None:
+        with profiling.timed("highlight", language):
+            html = original_hilite(self, shebang)
+        _cache.put(key, html)
+    else:
+        # hilite() normally leaves the stripped source behind
+        self.src = self.src.strip('\n')
+    return html
+
+def install(cache=None):
+    """Route codehilite highlighting through cache (the default cache if None)."""
+    global _cache
+    _cache = cache or get_highlight_cache()
+    codehilite.CodeHilite.hilite = cached_hilite
+
+def get_highlight_cache():
+    global _cache
+    if _cache is None:
+        _cache = HighlightCache()
+    return _cache
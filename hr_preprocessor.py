@@ -1,38 +1,29 @@
-from markdown.preprocessors import Preprocessor
 from markdown.extensions import Extension
-import re
 
-class HorizontalRulePreprocessor(Preprocessor):
-    """Convert different dash counts to different hr weights."""
+from line_scanner import get_line_scanner
+
+# A line of only dashes (and optional whitespace)
+HR_PATTERN = r'\s*(-+)\s*\Z'
 
-    def run(self, lines):
-        new_lines = []
-        for line in lines:
-            # Check if line is only dashes (and optional whitespace)
-            stripped = line.strip()
-            if re.match(r'^-+$', stripped):
-                dash_count = len(stripped)
-                if dash_count == 3:
-                    # Standard hr
-                    new_lines.append('<hr class="hr-heavy">')
-                elif dash_count == 4:
-                    # Medium hr
-                    new_lines.append('<hr class="hr-medium">')
-                elif dash_count == 5:
-                    # Light hr
-                    new_lines.append('<hr class="hr-light">')
-                elif dash_count >= 6:
-                    # Mini hr (30% width, left-aligned)
-                    new_lines.append('<hr class="hr-mini">')
-                else:
-                    new_lines.append(line)
-            else:
-                new_lines.append(line)
-        return new_lines
+HR_CLASSES = {
+    3: 'hr-heavy',   # Standard hr
+    4: 'hr-medium',  # Medium hr
+    5: 'hr-light',   # Light hr
+}
+
+def rewrite_hr(match, line):
+    """Convert different dash counts to different hr weights."""
+    dash_count = len(match.group(1))
+    if dash_count >= 6:
+        # Mini hr (30% width, left-aligned)
+        return '<hr class="hr-mini">'
+    if dash_count in HR_CLASSES:
+        return f'<hr class="{HR_CLASSES[dash_count]}">'
+    return line
 
 class HorizontalRuleExtension(Extension):
     def extendMarkdown(self, md):
-        md.preprocessors.register(HorizontalRulePreprocessor(md), 'hr_weights', 100)
+        get_line_scanner(md).add_rewriter('hr_weights', HR_PATTERN, rewrite_hr)
 
 def makeExtension(**kwargs):
     return HorizontalRuleExtension(**kwargs)
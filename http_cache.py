@@ -0,0 +1,155 @@
+"""
+Persistent on-disk cache for GitHub API responses.
+
+Each cached response keeps its ETag/Last-Modified validators, so later
+requests for the same URL are sent as conditional requests. GitHub does
+not count a 304 Not Modified against the rate limit, and the body is
+served from disk. In offline mode no network requests are made and
+everything is answered from the cache. When GitHub is unreachable or
+keeps failing, stale entries are served as well.
+
+POST requests (GraphQL queries) cannot be revalidated. They are always
+sent when online, and the cached copy is only used offline or when
+GitHub is unreachable.
+"""
+
+import hashlib
+import json
+import os
+
+import requests
+
+import profiling
+
+HTTP_CACHE_DIR = "./.cache/http"
+
+# Statuses worth remembering; a cached 404 lets offline builds know a repo has no README
+CACHEABLE_STATUSES = {200, 404}
+# Failures (after the scheduler's retries) where a stale copy beats no copy
+STALE_FALLBACK_STATUSES = {403, 429, 500, 502, 503, 504}
+
+
+class CachedResponse:
+    """The parts of a requests.Response the portfolio generator uses."""
+
+    def __init__(self, url, status_code, text, headers=None, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = requests.structures.CaseInsensitiveDict(headers or {})
+        self.from_cache = from_cache
+
+    @property
+    def links(self):
+        links = {}
+        header = self.headers.get("Link")
+        if header:
+            for link in requests.utils.parse_header_links(header):
+                links[link.get("rel") or link["url"]] = link
+        return links
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} for url: {self.url}", response=self)
+
+
+class HttpCache:
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, offline=False):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url, headers, body=""):
+        # Different Accept headers return different representations of the same URL
+        key = url + "\n" + headers.get("Accept", "") + "\n" + body
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _load(self, path):
+        try:
+            with profiling.timed("io", "read http cache"), open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _store(self, path, entry):
+        # Write through a temp file so concurrent fetch threads never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{id(entry)}.tmp"
+        with profiling.timed("io", "write http cache"), open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def _response(self, entry, from_cache=True):
+        headers = {"Link": entry["link"]} if entry.get("link") else {}
+        return CachedResponse(entry["url"], entry["status"], entry["body"], headers, from_cache)
+
+    def get(self, session, url, headers=None):
+        """GET url through the cache, revalidating any cached copy with a conditional request."""
+        headers = dict(headers or {})
+        path = self._path(url, headers)
+        entry = self._load(path)
+
+        if self.offline:
+            if entry is None:
+                return CachedResponse(url, 504, f"Not in cache (offline): {url}")
+            return self._response(entry)
+
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            r = session.get(url, headers=headers)
+        except requests.RequestException as e:
+            if entry is None:
+                raise
+            print(f"\t !  {type(e).__name__} fetching {url}, using cached copy")
+            return self._response(entry)
+
+        if r.status_code == 304 and entry is not None:
+            return self._response(entry)
+        if r.status_code in STALE_FALLBACK_STATUSES and entry is not None:
+            print(f"\t !  {r.status_code} fetching {url}, using cached copy")
+            return self._response(entry)
+        self._remember(path, url, r)
+        return r
+
+    def post(self, session, url, json_body, headers=None):
+        """POST json_body to url, falling back to the last cached response when offline or unreachable."""
+        headers = dict(headers or {})
+        path = self._path(url, headers, json.dumps(json_body, sort_keys=True))
+        entry = self._load(path)
+
+        if self.offline:
+            if entry is None:
+                return CachedResponse(url, 504, f"Not in cache (offline): POST {url}")
+            return self._response(entry)
+
+        try:
+            r = session.post(url, json=json_body, headers=headers)
+        except requests.RequestException as e:
+            if entry is None:
+                raise
+            print(f"\t !  {type(e).__name__} posting to {url}, using cached copy")
+            return self._response(entry)
+        if r.status_code in STALE_FALLBACK_STATUSES and entry is not None:
+            print(f"\t !  {r.status_code} posting to {url}, using cached copy")
+            return self._response(entry)
+        self._remember(path, url, r)
+        return r
+
+    def _remember(self, path, url, r):
+        if r.status_code in CACHEABLE_STATUSES:
+            entry = {
+                "url": url,
+                "status": r.status_code,
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "link": r.headers.get("Link"),
+                "body": r.text,
+            }
+            self._store(path, entry)
@@ -0,0 +1,112 @@
+"""
+Single-pass line scanner shared by the custom Markdown syntaxes.
+
+Instead of one preprocessor per syntax, each walking every line of the
+post, extensions register handlers on one LineScannerPreprocessor:
+
+- line rewriters replace a single line, e.g. weighted --- rules:
+
+      add_rewriter(name, pattern, rewrite)   # rewrite(match, line) -> line
+
+- block handlers take over from a line matching their start pattern and
+  consume as many lines as they need, e.g. inline notes:
+
+      add_block(name, pattern, handler)      # handler(match, scanner, out)
+
+The patterns of each kind are combined into one precompiled alternation,
+so a line that no handler wants costs two regex calls however many
+handlers there are. Every line goes through the rewriters once, as the
+scanner reaches it, before any block handler sees it.
+
+A block handler is called with the scanner on its start line. It must
+consume at least that line (scanner.advance()) and append whatever it
+produces to out. Lines it leaves unconsumed are scanned as usual.
+
+With build.py --profile, each handler is timed by name under the
+"line scanner" category.
+"""
+
+import re
+from markdown.preprocessors import Preprocessor
+
+import profiling
+
+
+class LineScanner:
+    """Cursor over a document's lines. scanner.line is the current (rewritten) line, None at the end."""
+
+    def __init__(self, lines, rewrite):
+        self._lines = lines
+        self._rewrite = rewrite
+        self._i = -1
+        self.advance()
+
+    def advance(self):
+        self._i += 1
+        self.line = self._rewrite(self._lines[self._i]) if self._i < len(self._lines) else None
+
+
+class LineScannerPreprocessor(Preprocessor):
+    """Run every registered line rewriter and block handler in one pass."""
+
+    def __init__(self, md=None):
+        super().__init__(md)
+        self.rewriters = []
+        self.blocks = []
+        self._rewrite_pattern = None
+        self._block_pattern = None
+
+    def add_rewriter(self, name, pattern, rewrite):
+        """Rewrite lines matching pattern (from the start of the line) to rewrite(match, line)."""
+        self.rewriters.append((name, re.compile(pattern), rewrite))
+        self._rewrite_pattern = None
+
+    def add_block(self, name, pattern, handler):
+        """Hand lines matching pattern (from the start of the line) to handler(match, scanner, out)."""
+        self.blocks.append((name, re.compile(pattern), handler))
+        self._block_pattern = None
+
+    @staticmethod
+    def _combine(handlers):
+        # Alternatives are tried in registration order; group _<i> tells which one matched
+        if not handlers:
+            return None
+        return re.compile("|".join(f"(?P<_{i}>{pattern.pattern})" for i, (_, pattern, _) in enumerate(handlers)))
+
+    def _rewrite(self, line):
+        m = self._rewrite_pattern.match(line) if self._rewrite_pattern else None
+        if m is None:
+            return line
+        name, pattern, rewrite = self.rewriters[int(m.lastgroup[1:])]
+        # Rewriters number their groups from 1, so rerun just that pattern
+        with profiling.timed("line scanner", name):
+            return rewrite(pattern.match(line), line)
+
+    def run(self, lines):
+        if self._rewrite_pattern is None:
+            self._rewrite_pattern = self._combine(self.rewriters)
+        if self._block_pattern is None:
+            self._block_pattern = self._combine(self.blocks)
+        block_pattern = self._block_pattern
+
+        new_lines = []
+        scanner = LineScanner(lines, self._rewrite)
+        while scanner.line is not None:
+            m = block_pattern.match(scanner.line) if block_pattern else None
+            if m is None:
+                new_lines.append(scanner.line)
+                scanner.advance()
+                continue
+            name, pattern, handler = self.blocks[int(m.lastgroup[1:])]
+            # Includes the rewriting of the lines the handler consumes
+            with profiling.timed("line scanner", name):
+                handler(pattern.match(scanner.line), scanner, new_lines)
+        return new_lines
+
+
+def get_line_scanner(md):
+    """Return md's shared LineScannerPreprocessor, registering it on first use."""
+    if 'line_scanner' not in md.preprocessors:
+        # After normalize_whitespace (30), before fenced_code_block (25)
+        md.preprocessors.register(LineScannerPreprocessor(md), 'line_scanner', 27)
+    return md.preprocessors['line_scanner']
@@ -0,0 +1,91 @@
+"""
+Shared Markdown pipeline for the site generators.
+
+Building a Markdown instance registers every extension again, so the
+converter is built once per process and reset() between documents:
+
+    from markdown_converter import convert
+    html = convert(markdown_text)
+
+A converter is not thread-safe; use one per process (or per thread via
+build_markdown()). Code highlighting goes through the on-disk cache in
+highlight_cache.py.
+"""
+
+import sys
+import markdown
+
+# Register the custom Asa lexer
+from asa_lexer import AsaLexer
+from pygments import lexers
+
+# Import custom horizontal rule extension
+from hr_preprocessor import HorizontalRuleExtension
+
+# Import custom inline note extension
+from inline_note_preprocessor import InlineNoteExtension
+
+# Import post metadata (title/thumbnail/description) extension
+from post_metadata import PostMetadataExtension, add_description
+
+# Cache of highlighted code blocks
+import highlight_cache
+
+import profiling
+
+# Register the lexer class
+def get_asa_lexer():
+    return AsaLexer
+
+# Patch the get_lexer_by_name function to handle 'asa'
+original_get_lexer_by_name = lexers.get_lexer_by_name
+def patched_get_lexer_by_name(name, **options):
+    if name == 'asa':
+        return AsaLexer(**options)
+    return original_get_lexer_by_name(name, **options)
+
+def register_asa_lexer():
+    """Install the patched lookup, including codehilite's own imported reference."""
+    lexers.get_lexer_by_name = patched_get_lexer_by_name
+    codehilite = sys.modules.get("markdown.extensions.codehilite")
+    if codehilite is not None:
+        codehilite.get_lexer_by_name = patched_get_lexer_by_name
+register_asa_lexer()
+
+
+def get_extensions():
+    return ['fenced_code', 'codehilite', 'pymdownx.inlinehilite', 'pymdownx.details', 'toc', 'extra', 'admonition', 'nl2br', InlineNoteExtension(), HorizontalRuleExtension(), PostMetadataExtension()]
+
+EXTENSION_CONFIGS = {
+    'codehilite': {
+        'guess_lang': False
+    }
+}
+
+def build_markdown():
+    """Build a new Markdown instance with the blog's extensions."""
+    return markdown.Markdown(extensions=get_extensions(), extension_configs=EXTENSION_CONFIGS)
+
+_converter = None
+
+def get_converter():
+    """Return this process's shared Markdown instance, building it on first use."""
+    global _converter
+    if _converter is None:
+        register_asa_lexer()
+        highlight_cache.install()
+        _converter = build_markdown()
+        if profiling.active():
+            profiling.instrument_markdown(_converter)
+    return _converter
+
+def convert(markdown_text):
+    """Convert a Markdown document to HTML with the shared converter."""
+    return get_converter().reset().convert(markdown_text)
+
+def convert_with_metadata(markdown_text):
+    """Convert a Markdown document, returning (html, post metadata)."""
+    md = get_converter()
+    html = md.reset().convert(markdown_text)
+    add_description(md, html)
+    return html, dict(md.post_metadata)
@@ -0,0 +1,165 @@
+"""
+Write-if-changed output for the site generators.
+
+Rewriting every page on every build gives every file a new mtime, so the
+static host and CDN see the whole site as changed. Pages written through
+this module are compared with what is already on disk and only replaced,
+atomically through a temporary file and os.replace(), when their bytes
+differ. Unchanged files keep their mtime.
+
+    import output_writer
+    output_writer.write_text("b/post.html", html)
+    with output_writer.open_text("b/index.html") as f:
+        f.write(...)
+    output_writer.remove("b/old.html")
+    output_writer.print_summary()
+
+Every write and removal is recorded; drain() and merge() move the record
+from render worker processes to the main one, and write_change_list()
+saves it for deploy scripts (build.py --changes).
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import threading
+
+import profiling
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class OutputChanges:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.written = []
+        self.removed = []
+        self.unchanged = 0
+
+    def record(self, path, changed):
+        with self._lock:
+            if changed:
+                self.written.append(os.path.normpath(path))
+            else:
+                self.unchanged += 1
+
+    def record_removed(self, path):
+        with self._lock:
+            self.removed.append(os.path.normpath(path))
+
+    def merge(self, changes):
+        with self._lock:
+            self.written.extend(changes["written"])
+            self.removed.extend(changes["removed"])
+            self.unchanged += changes["unchanged"]
+
+    def counts(self):
+        with self._lock:
+            return len(self.written), self.unchanged, len(self.removed)
+
+    def drain(self):
+        """Return and clear what has been recorded."""
+        with self._lock:
+            changes = {"written": self.written, "removed": self.removed, "unchanged": self.unchanged}
+            self.written, self.removed, self.unchanged = [], [], 0
+        return changes
+
+
+_changes = OutputChanges()
+
+
+def file_hash(path):
+    """SHA-256 of the file at path, or None if it does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+def _temp_path(path):
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def _replace(tmp_path, path):
+    # Keep the permissions of the file being replaced, as open(path, 'w') would
+    try:
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+    except FileNotFoundError:
+        pass
+    os.replace(tmp_path, path)
+
+
+def write_bytes(path, data):
+    """Write data to path unless it already holds exactly data. Returns True if the file changed."""
+    with profiling.timed("io", f"write {os.path.basename(path)}"):
+        try:
+            changed = os.path.getsize(path) != len(data) or file_hash(path) != hashlib.sha256(data).hexdigest()
+        except FileNotFoundError:
+            changed = True
+        if changed:
+            tmp_path = _temp_path(path)
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            _replace(tmp_path, path)
+    _changes.record(path, changed)
+    return changed
+
+def write_text(path, text, encoding="utf-8"):
+    """Text version of write_bytes(), with the same newline translation as open(path, 'w')."""
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)
+    return write_bytes(path, text.encode(encoding))
+
+@contextlib.contextmanager
+def open_text(path, encoding="utf-8"):
+    """Stream a file's content to a temporary file, which replaces path only if it differs.
+
+    Nothing is replaced if the block raises.
+    """
+    tmp_path = _temp_path(path)
+    try:
+        with open(tmp_path, 'w', encoding=encoding) as f:
+            yield f
+        with profiling.timed("io", f"compare {os.path.basename(path)}"):
+            try:
+                changed = os.path.getsize(path) != os.path.getsize(tmp_path) or file_hash(path) != file_hash(tmp_path)
+            except FileNotFoundError:
+                changed = True
+        if changed:
+            _replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    _changes.record(path, changed)
+
+def remove(path):
+    """Delete an output file that is no longer generated."""
+    os.remove(path)
+    _changes.record_removed(path)
+
+
+def drain():
+    return _changes.drain()
+
+def merge(changes):
+    if changes:
+        _changes.merge(changes)
+
+def print_summary():
+    """Print how many outputs were written, left unchanged and removed since the last drain."""
+    written, unchanged, removed = _changes.counts()
+    print(f"Output: {written} written, {unchanged} unchanged, {removed} removed")
+
+def write_change_list(path):
+    """Save the changed and removed paths as JSON, e.g. for a deploy upload or CDN invalidation."""
+    changes = drain()
+    changes["written"] = sorted(set(changes["written"]))
+    changes["removed"] = sorted(set(changes["removed"]) - set(changes["written"]))
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(changes, f, indent=2)
+    print(f"Changed outputs ({len(changes['written'])} written, {len(changes['removed'])} removed) listed in {path}")
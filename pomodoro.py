@@ -0,0 +1,406 @@
+"""
+Pre-aggregated pomodoro statistics for the data dashboard.
+
+data/index.html used to download the whole pomodoro/history.csv (six
+timestamp columns per session) and count sessions in the browser. This
+pipeline reads the CSV and writes data/pomodoro/summary.json: small,
+columnar series the page can draw directly.
+
+    {
+      "last_timestamp": 1777604820,          # End Timestamp (Unix) of the newest session counted
+      "sessions": 360, "seconds": 540000,
+      "daily":  {"start": "2025-04-06", "count": [...], "seconds": [...]},
+      "weekly": {"start": "2025-04-06", "count": [...], "seconds": [...]},
+      "hour_of_day": {"count": [24 values], "seconds": [24 values]},
+      "streaks": {"longest": {"days": 12, "start": ..., "end": ...}, "current": {...}}
+    }
+
+Daily and weekly series are dense: entry i is day (or week) i after
+"start". Weeks start on Sunday, like the dashboard's heatmap columns.
+Days and hours are the session's local end date and hour, as logged.
+"current" is the streak ending on the last day with a session; the page
+decides whether it is still running today.
+
+The update is incremental. Only rows whose End Timestamp (Unix) is newer
+than the summary's last_timestamp are added. .cache/pomodoro.json also
+remembers how far into the CSV the last run read, so when rows have only
+been appended, reading resumes there instead of rescanning the file.
+
+New exports from the pomodoro app are merged in with ingest() rather
+than replacing history.csv:
+
+    python build.py pomodoro --ingest ~/Downloads/export.csv [...]
+
+history.csv is the canonical, append-only store. Each export is streamed
+row by row and checked against a sorted index of (End Timestamp,
+Duration) keys in .cache/pomodoro_index.bin, so sessions that are
+already stored are skipped, as are sessions that overlap a stored one
+(the same session re-exported with a different duration, say). Keys use
+the Unix timestamp, so a session exported again after a timezone change
+still matches. New sessions are appended with their local date and time
+written in their own UTC offset, and the index is kept for the next
+ingest, so only the new rows are parsed. Each export's added, duplicate,
+overlapping and invalid rows are reported.
+
+    python build.py pomodoro [--full]
+"""
+
+import bisect
+import csv
+import io
+import json
+import os
+from array import array
+from datetime import date, datetime, timedelta, timezone
+
+import output_writer
+import profiling
+
+HISTORY_PATH = "./data/pomodoro/history.csv"
+SUMMARY_PATH = "./data/pomodoro/summary.json"
+CURSOR_PATH = "./.cache/pomodoro.json"
+INDEX_PATH = "./.cache/pomodoro_index.bin"
+
+ISO_COLUMN = "End (ISO 8601)"
+TIMESTAMP_COLUMN = "End Timestamp (Unix)"
+DATE_COLUMN = "End Date"
+TIME_COLUMN = "End Time (24 Hour)"
+OFFSET_COLUMN = "End Timezone (UTC Offset Minutes)"
+DURATION_COLUMN = "Duration (Seconds)"
+HISTORY_COLUMNS = (ISO_COLUMN, DATE_COLUMN, TIME_COLUMN, TIMESTAMP_COLUMN, OFFSET_COLUMN, DURATION_COLUMN)
+# Bytes before the cursor that must be unchanged for reading to resume there
+CURSOR_TAIL_BYTES = 256
+# Session keys are timestamp * DURATION_LIMIT + duration, so durations must stay below it (about 12 days)
+DURATION_LIMIT = 1 << 20
+# End times are logged to the minute, so back-to-back sessions can seem to overlap by up to this many seconds
+OVERLAP_TOLERANCE = 60
+
+
+def empty_summary():
+    return {
+        "last_timestamp": None,
+        "sessions": 0,
+        "seconds": 0,
+        "daily": {"start": None, "count": [], "seconds": []},
+        "hour_of_day": {"count": [0] * 24, "seconds": [0] * 24},
+    }
+
+def load_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def cursor_at(f, offset):
+    """Remember offset in the open binary file f, with the bytes just before it."""
+    f.seek(max(0, offset - CURSOR_TAIL_BYTES))
+    return {"offset": offset, "tail": f.read(offset - f.tell()).hex()}
+
+def resumes_at(f, cursor):
+    """True if f still holds the bytes the cursor saw before its offset, i.e. it was only appended to."""
+    tail = bytes.fromhex(cursor["tail"])
+    if cursor["offset"] > os.fstat(f.fileno()).st_size:
+        return False
+    f.seek(cursor["offset"] - len(tail))
+    return f.read(len(tail)) == tail
+
+
+def read_new_rows(history_path, watermark, cursor=None):
+    """Return the (timestamp, date, hour, seconds) of rows newer than watermark, and the new cursor.
+
+    Reading starts at the cursor's offset if the file still holds the same
+    bytes just before it (rows were only appended); otherwise the whole
+    file is scanned and filtered by the watermark.
+    """
+    with open(history_path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode("utf-8-sig")]))
+        columns = [header.index(name) for name in (TIMESTAMP_COLUMN, DATE_COLUMN, TIME_COLUMN, DURATION_COLUMN)]
+        if cursor and cursor.get("last_timestamp") == watermark and cursor["offset"] >= f.tell():
+            if resumes_at(f, cursor):
+                f.seek(cursor["offset"])
+            else:
+                print("\t ! history.csv was changed, not just appended to; rescanning it")
+                f.seek(0)
+                f.readline()
+        with profiling.timed("io", "read history.csv"):
+            text = f.read().decode("utf-8")
+        cursor = cursor_at(f, f.tell())
+
+    rows = []
+    timestamp_column, date_column, time_column, duration_column = columns
+    for row in csv.reader(io.StringIO(text, newline="")):
+        if not row:
+            continue
+        timestamp = int(row[timestamp_column])
+        if watermark is not None and timestamp <= watermark:
+            continue
+        hour = int(row[time_column].split(":", 1)[0])
+        rows.append((timestamp, row[date_column], hour, int(float(row[duration_column]))))
+    return rows, cursor
+
+def add_row(summary, day, hour, seconds):
+    daily = summary["daily"]
+    day = date.fromisoformat(day)
+    if daily["start"] is None:
+        daily["start"] = day.isoformat()
+    start = date.fromisoformat(daily["start"])
+    if day < start:
+        # Earlier than anything seen (e.g. a timezone change); extend the series backwards
+        padding = (start - day).days
+        daily["count"][:0] = [0] * padding
+        daily["seconds"][:0] = [0] * padding
+        daily["start"] = day.isoformat()
+        start = day
+    index = (day - start).days
+    if index >= len(daily["count"]):
+        padding = index + 1 - len(daily["count"])
+        daily["count"].extend([0] * padding)
+        daily["seconds"].extend([0] * padding)
+    daily["count"][index] += 1
+    daily["seconds"][index] += seconds
+    summary["hour_of_day"]["count"][hour] += 1
+    summary["hour_of_day"]["seconds"][hour] += seconds
+    summary["sessions"] += 1
+    summary["seconds"] += seconds
+
+def weekly_series(daily):
+    """Sum the daily series into weeks starting on Sunday."""
+    if daily["start"] is None:
+        return {"start": None, "count": [], "seconds": []}
+    start = date.fromisoformat(daily["start"])
+    # date.weekday() is 0 on Monday; step back to the Sunday on or before start
+    week_start = start - timedelta(days=(start.weekday() + 1) % 7)
+    offset = (start - week_start).days
+    weeks = (offset + len(daily["count"]) + 6) // 7
+    count = [0] * weeks
+    seconds = [0] * weeks
+    for i, (day_count, day_seconds) in enumerate(zip(daily["count"], daily["seconds"])):
+        count[(offset + i) // 7] += day_count
+        seconds[(offset + i) // 7] += day_seconds
+    return {"start": week_start.isoformat(), "count": count, "seconds": seconds}
+
+def streaks(daily):
+    """Longest run of consecutive days with a session, and the run ending on the last such day."""
+    longest = current = None
+    run_start = None
+    start = date.fromisoformat(daily["start"]) if daily["start"] else None
+    for i, count in enumerate(daily["count"] + [0]):
+        if count and run_start is None:
+            run_start = i
+        elif not count and run_start is not None:
+            run = {"days": i - run_start, "start": (start + timedelta(days=run_start)).isoformat(),
+                   "end": (start + timedelta(days=i - 1)).isoformat()}
+            if longest is None or run["days"] > longest["days"]:
+                longest = run
+            current = run
+            run_start = None
+    return {"longest": longest, "current": current}
+
+
+def update_summary(history_path=HISTORY_PATH, summary_path=SUMMARY_PATH, cursor_path=CURSOR_PATH, full=False):
+    """Add the sessions logged since the last run to the summary. Returns the number of new sessions."""
+    summary = None if full else load_json(summary_path)
+    if summary is None:
+        summary = empty_summary()
+    cursor = None if full else load_json(cursor_path)
+
+    rows, new_cursor = read_new_rows(history_path, summary["last_timestamp"], cursor)
+    with profiling.timed("pomodoro", "aggregate"):
+        for timestamp, day, hour, seconds in rows:
+            add_row(summary, day, hour, seconds)
+            if summary["last_timestamp"] is None or timestamp > summary["last_timestamp"]:
+                summary["last_timestamp"] = timestamp
+
+    summary["weekly"] = weekly_series(summary["daily"])
+    summary["streaks"] = streaks(summary["daily"])
+    output_writer.write_text(summary_path, json.dumps(summary, separators=(",", ":")) + "\n")
+    new_cursor["last_timestamp"] = summary["last_timestamp"]
+    os.makedirs(os.path.dirname(cursor_path), exist_ok=True)
+    with open(cursor_path, 'w', encoding='utf-8') as f:
+        json.dump(new_cursor, f)
+    print(f"Pomodoro summary: {len(rows)} new session(s), {summary['sessions']} in total -> {summary_path}")
+    return len(rows)
+
+
+def session_key(timestamp, duration):
+    """One sortable integer per session: its end timestamp, then its duration."""
+    return timestamp * DURATION_LIMIT + duration
+
+def session_from_row(row, columns):
+    """(End Timestamp, UTC offset in minutes, duration) of an export row. Raises ValueError if it is unusable.
+
+    A missing timestamp or offset is taken from the ISO 8601 end time, or
+    from the local end date and time and the offset.
+    """
+    def value(name):
+        index = columns.get(name)
+        return row[index].strip() if index is not None and index < len(row) else ""
+
+    iso = datetime.fromisoformat(value(ISO_COLUMN)) if value(ISO_COLUMN) else None
+    if value(OFFSET_COLUMN):
+        offset = int(value(OFFSET_COLUMN))
+    elif iso is not None and iso.utcoffset() is not None:
+        offset = int(iso.utcoffset().total_seconds() // 60)
+    else:
+        raise ValueError("no timezone offset")
+    if value(TIMESTAMP_COLUMN):
+        timestamp = int(float(value(TIMESTAMP_COLUMN)))
+    elif iso is not None and iso.utcoffset() is not None:
+        timestamp = int(iso.timestamp())
+    elif value(DATE_COLUMN) and value(TIME_COLUMN):
+        local = datetime.fromisoformat(f"{value(DATE_COLUMN)}T{value(TIME_COLUMN)}")
+        timestamp = int(local.replace(tzinfo=timezone(timedelta(minutes=offset))).timestamp())
+    else:
+        raise ValueError("no end time")
+    duration = int(float(value(DURATION_COLUMN)))
+    if not 0 < duration < DURATION_LIMIT:
+        raise ValueError(f"duration {duration}")
+    return timestamp, offset, duration
+
+def history_row(timestamp, offset, duration):
+    """A history.csv row, with the local end time written in the session's own UTC offset."""
+    end = datetime.fromtimestamp(timestamp, timezone(timedelta(minutes=offset)))
+    utc_offset = end.strftime("%z")
+    return [end.strftime("%Y-%m-%dT%H:%M:%S.000") + f"{utc_offset[:3]}:{utc_offset[3:]}", end.date().isoformat(),
+            end.strftime("%H:%M:%S"), timestamp, offset, duration]
+
+def overlapping_session(index, position, timestamp, duration):
+    """The key of an indexed session next to position that overlaps this one by more than OVERLAP_TOLERANCE."""
+    if position > 0:
+        before = index[position - 1]
+        if before // DURATION_LIMIT - OVERLAP_TOLERANCE > timestamp - duration:
+            return before
+    if position < len(index):
+        after = index[position]
+        after_start = after // DURATION_LIMIT - after % DURATION_LIMIT
+        if after_start + OVERLAP_TOLERANCE < timestamp:
+            return after
+    return None
+
+
+def load_index(history_path, index_path, full=False):
+    """The sorted session keys of the history.
+
+    The saved index is reused if history.csv has only been appended to
+    since (judged, like the summary cursor, by the bytes before the saved
+    offset), and the appended rows are added to it; otherwise, or with
+    full, the index is rebuilt from the CSV.
+    """
+    state = None if full else load_json(index_path + ".json")
+    index = array("q")
+    with open(history_path, 'rb') as f:
+        columns = {name: i for i, name in enumerate(next(csv.reader([f.readline().decode("utf-8-sig")]), []))}
+        start = f.tell()
+        reuse = state is not None and os.path.exists(index_path) and resumes_at(f, state)
+        if reuse:
+            with profiling.timed("io", "read session index"), open(index_path, 'rb') as index_file:
+                index.frombytes(index_file.read())
+            reuse = len(index) == state["sessions"]
+        if reuse:
+            start = state["offset"]
+        else:
+            index = array("q")
+            if state is not None:
+                print("\t ! history.csv was changed, not just appended to; reindexing it")
+        f.seek(start)
+        indexed = len(index)
+        for row in csv.reader(io.TextIOWrapper(f, encoding="utf-8", newline="")):
+            if not row:
+                continue
+            try:
+                timestamp, _, duration = session_from_row(row, columns)
+            except ValueError as e:
+                print(f"\t ! {history_path}: skipping unusable row ({e})")
+                continue
+            index.append(session_key(timestamp, duration))
+    if len(index) > indexed:
+        index = array("q", sorted(index))
+    return index
+
+def save_index(index, history_path, index_path):
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    with open(index_path, 'wb') as f:
+        index.tofile(f)
+    with open(history_path, 'rb') as f:
+        state = cursor_at(f, os.fstat(f.fileno()).st_size)
+    state["sessions"] = len(index)
+    with open(index_path + ".json", 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+
+def ingest(export_paths, history_path=HISTORY_PATH, index_path=INDEX_PATH, summary_path=SUMMARY_PATH,
+           cursor_path=CURSOR_PATH, full=False):
+    """Append the sessions in export_paths that history.csv does not have yet, then update the summary.
+
+    Returns {export path: {"added": n, "duplicate": n, "overlapping": n, "invalid": n}}.
+    """
+    if not os.path.exists(history_path):
+        with open(history_path, 'w', encoding='utf-8', newline="") as f:
+            csv.writer(f, lineterminator="\n").writerow(HISTORY_COLUMNS)
+    index = load_index(history_path, index_path, full)
+    watermark = (load_json(summary_path) or {}).get("last_timestamp")
+    backfilled = False
+    report = {}
+
+    with open(history_path, 'rb+') as history:
+        # Make sure the first appended row starts on its own line
+        history.seek(0, os.SEEK_END)
+        if history.tell():
+            history.seek(-1, os.SEEK_END)
+            if history.read(1) != b"\n":
+                history.write(b"\n")
+        writer = csv.writer(io.TextIOWrapper(history, encoding="utf-8", newline="", write_through=True),
+                            lineterminator="\n")
+        for export_path in export_paths:
+            counts = report[export_path] = {"added": 0, "duplicate": 0, "overlapping": 0, "invalid": 0}
+            with profiling.timed("pomodoro", f"ingest {os.path.basename(export_path)}"), \
+                    open(export_path, 'r', encoding='utf-8-sig', newline="") as f:
+                reader = csv.reader(f)
+                columns = {name.strip(): i for i, name in enumerate(next(reader, []))}
+                for line, row in enumerate(reader, start=2):
+                    if not row:
+                        continue
+                    try:
+                        timestamp, offset, duration = session_from_row(row, columns)
+                    except ValueError as e:
+                        print(f"\t ! {export_path}:{line}: skipping unusable row ({e})")
+                        counts["invalid"] += 1
+                        continue
+                    key = session_key(timestamp, duration)
+                    position = bisect.bisect_left(index, key)
+                    if position < len(index) and index[position] == key:
+                        counts["duplicate"] += 1
+                        continue
+                    overlap = overlapping_session(index, position, timestamp, duration)
+                    if overlap is not None:
+                        other = datetime.fromtimestamp(overlap // DURATION_LIMIT, timezone.utc).isoformat()
+                        print(f"\t ! {export_path}:{line}: skipping the session ending "
+                              f"{history_row(timestamp, offset, duration)[0]}, it overlaps the one ending {other}")
+                        counts["overlapping"] += 1
+                        continue
+                    writer.writerow(history_row(timestamp, offset, duration))
+                    index.insert(position, key)
+                    counts["added"] += 1
+                    if watermark is not None and timestamp <= watermark:
+                        backfilled = True
+            print(f"{export_path}: {counts['added']} added, {counts['duplicate']} duplicate, "
+                  f"{counts['overlapping']} overlapping, {counts['invalid']} invalid")
+
+    save_index(index, history_path, index_path)
+    if backfilled:
+        # The summary only adds sessions newer than its last one
+        print("\t ! Some sessions are older than the summary's newest; rebuilding it")
+    update_summary(history_path, summary_path, cursor_path, full=full or backfilled)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Aggregate the pomodoro history for the data dashboard.")
+    parser.add_argument("--full", action="store_true", help="rebuild the summary (and session index) from the whole history")
+    parser.add_argument("--ingest", nargs="+", metavar="EXPORT", help="merge exported session CSVs into the history first")
+    args = parser.parse_args()
+    if args.ingest:
+        ingest(args.ingest, full=args.full)
+    else:
+        update_summary(full=args.full)
@@ -0,0 +1,306 @@
+"""
+Post metadata (title, thumbnail and description) captured while a post is converted.
+
+The blog home page used to re-read every post's Markdown and re-parse its
+generated HTML. PostMetadataExtension collects the same values in the same
+pass that renders the post and leaves them on md.post_metadata:
+
+- title: the text of the post's <title> tag
+- thumb: the first image in the post (see get_readme_image_url)
+- description: text of the body's top-level paragraphs (see extract_description),
+  filled in from the finished HTML by add_description()
+- date: the datetime attribute of the post's first <time> tag, e.g.
+  <time datetime="2025-03-14">March 14, 2025</time>, used to order the home page
+"""
+
+import os
+import re
+from markdown.preprocessors import Preprocessor
+from markdown.extensions import Extension
+
+import profiling
+
+# Length of descriptions shown on the blog home page
+DESCRIPTION_CHARS = 500
+
+
+def get_readme_image_url(content):
+    # find an image that is manually set for use in blog with class="blog"
+    match = re.search(r'class\s*=\s*"blog"\s*src\s*=\s*"(.+?)"', content)
+    # If not found, look for images using markdown
+    if not match:
+        match = re.search(r'!\[.*?\]\((.*?)\)', content)
+    # If not found, look for images using img tags
+    if not match:
+        match = re.search(r'src\s*=\s*"(.+?)"', content)
+    if not match:
+        return None
+    url = match.group(1).strip()
+    if url.startswith("http://") or url.startswith("https://"):
+        # Absolute URL, use as-is
+        print(f"Image: {url}")
+        return url
+    else:
+        return url
+
+# Patterns used by DescriptionExtractor, compiled once
+BODY_START = '<div class="blog-body">'
+BODY_END = '</body>'
+OPEN_TAG_RE = re.compile(r'<(\w+)[^>]*>')
+PARAGRAPH_RE = re.compile(r'<p>(.*?)</p>', re.DOTALL)
+CLOSE_TAG_RE = re.compile(r'</(\w+)>')
+# Paragraph content that is entirely wrapped in tags: ^\s*<.+>\s*$
+# E.g., "<title>...</title>" or "<img src='...'>" but not "text <title>...</title>"
+ONLY_TAGS_RE = re.compile(r'^\s*<.+>\s*$', re.DOTALL)
+TAG_RE = re.compile(r'<[^>]+>')
+# Tags that don't count towards nesting depth
+FLAT_TAGS = {'p', 'br', 'img', 'hr'}
+TIME_RE = re.compile(r'<time\b[^>]*\bdatetime\s*=\s*"([^"]+)"')
+READ_CHUNK_SIZE = 64 * 1024
+# Input kept from the previous chunk, so markers split across chunks are still found
+MARKER_OVERLAP = len(BODY_END) - 1
+
+
+class DescriptionExtractor:
+    """Event-driven extractor for text of the <p> tags that are direct children of a blog body.
+
+    HTML is fed in chunks and scanned once, left to right; scanning stops as
+    soon as max_chars of text have been collected. With in_body=False the
+    input is a full page and only the part between <div class="blog-body">
+    and </body> is scanned. A page without </body> has no description, so
+    after that the rest of the input is only searched for </body>.
+    """
+
+    def __init__(self, max_chars=256, in_body=False):
+        self.max_chars = max_chars
+        self.started = in_body
+        self.stop_at_body_end = not in_body
+        self.done = False
+        # max_chars of text collected
+        self.full = False
+        self.text = []
+        self.length = 0
+        self.depth = 0
+        self.buffer = ""
+        self.pos = 0
+        # Index of </body> in the buffer, once seen
+        self.end = None
+        # What the scan stopped to wait for ('>' or '</p>'), the chunks received
+        # since, and the last few characters of input
+        self.waiting_for = None
+        self.pending = []
+        self.tail = ""
+
+    def feed(self, data, last=False):
+        """Scan another chunk of HTML. Returns True once no more input is needed.
+
+        Pass last=True with the final chunk when it is known up front.
+        """
+        if self.done:
+            return True
+        window = self.tail + data
+        self.tail = window[-MARKER_OVERLAP:]
+        if self.full:
+            # The description is complete once the body is known to end
+            if BODY_END in window:
+                self.done = True
+            elif last:
+                self.text = []
+                self.done = True
+            return self.done
+        if self.waiting_for is not None and not last and self.waiting_for not in window and \
+                not (self.stop_at_body_end and BODY_END in window):
+            # Still inside the construct the scan stopped in: hold the chunk instead of
+            # copying the buffer again, which is quadratic within a long paragraph
+            self.pending.append(data)
+            return False
+        # Drop everything already consumed so the buffer only holds undecided input
+        searched = len(self.buffer) - self.pos + sum(map(len, self.pending))
+        self.buffer = "".join([self.buffer[self.pos:], *self.pending, data])
+        self.pending = []
+        self.pos = 0
+        if not self.started:
+            start = self.buffer.find(BODY_START)
+            if start == -1:
+                if last:
+                    self.done = True
+                    return True
+                # Keep just enough to match a marker split across chunks
+                self.pos = max(0, len(self.buffer) - len(BODY_START) + 1)
+                return False
+            self.started = True
+            self.pos = start + len(BODY_START)
+            searched = 0
+        if self.stop_at_body_end:
+            # Only new data (and a marker's length before it) can hold </body>
+            end = self.buffer.find(BODY_END, max(self.pos, searched - len(BODY_END) + 1))
+            if end != -1:
+                self.end = end
+            elif last:
+                # The blog body never ends, so there is no description
+                self.text = []
+                self.done = True
+                return True
+        self._scan(final=last or self.end is not None)
+        if self.full and (self.end is not None or not self.stop_at_body_end):
+            self.done = True
+        elif self.full and last:
+            self.text = []
+            self.done = True
+        return self.done
+
+    def close(self):
+        """Finish scanning at end of input and return the description."""
+        if not self.done:
+            if not self.started or self.stop_at_body_end:
+                # No blog body, or it never ended
+                return ""
+            self.buffer = "".join([self.buffer, *self.pending])
+            self.pending = []
+            self._scan(final=True)
+        return "".join(self.text)[:self.max_chars].strip()
+
+    def _scan(self, final):
+        self.waiting_for = None
+        buffer = self.buffer
+        limit = self.end if self.end is not None else len(buffer)
+        pos = self.pos
+        while pos < limit:
+            pos = buffer.find('<', pos, limit)
+            if pos == -1:
+                pos = limit
+                break
+            # Every construct ends at a '>'; without one it may still be arriving
+            if not final and buffer.find('>', pos, limit) == -1:
+                self.waiting_for = '>'
+                break
+
+            tag_match = OPEN_TAG_RE.match(buffer, pos, limit)
+            if tag_match:
+                tag_name = tag_match.group(1).lower()
+
+                # Track depth for non-paragraph tags
+                if tag_name not in FLAT_TAGS:
+                    self.depth += 1
+                    pos = tag_match.end()
+                    continue
+
+                # Found a <p> tag at depth 0 (direct child)
+                if tag_name == 'p' and self.depth == 0:
+                    if not final and buffer.find('</p>', pos, limit) == -1:
+                        self.waiting_for = '</p>'
+                        break
+                    p_match = PARAGRAPH_RE.match(buffer, pos, limit)
+                    if p_match:
+                        pos = p_match.end()
+                        p_content = p_match.group(1)
+
+                        # Skip this <p> if it only contains tags with no direct text
+                        if ONLY_TAGS_RE.match(p_content):
+                            continue
+
+                        # Remove any HTML tags within the <p> and decode HTML entities
+                        clean_text = TAG_RE.sub('', p_content)
+                        clean_text = clean_text.replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&')
+                        clean_text = clean_text.strip()
+
+                        if clean_text:
+                            self.text.append(clean_text + "\n")
+                            self.length += len(clean_text) + 1
+                            if self.length >= self.max_chars:
+                                self.full = True
+                                break
+                        continue
+
+            # Check for closing tags
+            close_match = CLOSE_TAG_RE.match(buffer, pos, limit)
+            if close_match:
+                if close_match.group(1).lower() not in FLAT_TAGS:
+                    self.depth = max(0, self.depth - 1)
+                pos = close_match.end()
+                continue
+
+            pos += 1
+
+        self.pos = pos
+        if final and pos >= limit and not self.full:
+            self.done = True
+
+
+def extract_description_from_html(html_content, max_chars=256):
+    """Extract text from <p> tags that are direct children of blog-body div."""
+    with profiling.timed("description", "extract_description_from_html"):
+        extractor = DescriptionExtractor(max_chars)
+        extractor.feed(html_content, last=True)
+        return extractor.close()
+
+def extract_description_from_file(source, max_chars=256):
+    """extract_description_from_html() for a page on disk.
+
+    source is a path (str or os.PathLike) or a readable text stream. It is
+    read in chunks, and only until the description is complete and </body>
+    has been seen.
+    """
+    with profiling.timed("description", "extract_description_from_file"):
+        extractor = DescriptionExtractor(max_chars)
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'r', encoding='utf-8') as f:
+                _feed_stream(extractor, f)
+        else:
+            _feed_stream(extractor, source)
+        return extractor.close()
+
+
+def _feed_stream(extractor, stream):
+    while True:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        if not chunk or extractor.feed(chunk):
+            return
+
+
+def extract_description(blog_content, max_chars=256):
+    """Extract text from the <p> tags that are direct children of a blog body."""
+    with profiling.timed("description", "extract_description"):
+        extractor = DescriptionExtractor(max_chars, in_body=True)
+        extractor.feed(blog_content, last=True)
+        return extractor.close()
+
+
+class PostMetadataPreprocessor(Preprocessor):
+    """Capture the title, thumbnail and date from the unprocessed Markdown source."""
+
+    def run(self, lines):
+        source = "\n".join(lines)
+        match = re.search(r'<title>(.+?)<\/title>', source)
+        self.md.post_metadata["title"] = match.group(1).strip() if match else None
+        self.md.post_metadata["thumb"] = get_readme_image_url(source)
+        match = TIME_RE.search(source)
+        self.md.post_metadata["date"] = match.group(1).strip() if match else None
+        return lines
+
+
+def add_description(md, html):
+    """Set md.post_metadata["description"] from the document's final HTML.
+
+    This is not a postprocessor: the toc extension runs the postprocessors
+    on the text of every heading as well as on the document.
+    """
+    md.post_metadata["description"] = extract_description(html, max_chars=DESCRIPTION_CHARS)
+
+
+class PostMetadataExtension(Extension):
+    """Extension to collect post metadata during conversion."""
+
+    def extendMarkdown(self, md):
+        md.registerExtension(self)
+        self.md = md
+        self.reset()
+        # Run before any other preprocessor so the source is seen as written
+        md.preprocessors.register(PostMetadataPreprocessor(md), 'post_metadata', 200)
+
+    def reset(self):
+        self.md.post_metadata = {"title": None, "thumb": None, "description": "", "date": None}
+
+
+def makeExtension(**kwargs):
+    return PostMetadataExtension(**kwargs)
@@ -0,0 +1,157 @@
+"""
+Build instrumentation: per-stage timings collected into a JSON report.
+
+Profiling is off unless start() has been called (build.py --profile), and
+timed() then costs a single check. While it is on, the generators time:
+
+- stage        top-level build steps (rendering, home page, portfolio fetches)
+- markdown     each post's Markdown conversion
+- preprocessor, treeprocessor, postprocessor
+               each registered Markdown processor, by class name
+- line scanner each rewriter and block handler of the fused line scanner
+               (line_scanner.py), by the name it was added under
+- highlight    Pygments highlighting per language (highlight cache hits
+               are timed separately as "highlight cached")
+- description  description extraction
+- thumbnail    resizing and encoding card thumbnails
+- sprites      encoding sprite atlases
+- pomodoro     aggregating new pomodoro sessions
+- fonts        subsetting web fonts
+- io           reading posts, writing pages, the manifest and the HTTP cache
+- network      each GitHub request, by URL (count is the number of attempts)
+- rate limit   time spent waiting for the request scheduler
+
+    import profiling
+    profiling.start()
+    with profiling.timed("stage", "render"):
+        ...
+    profiling.write_report("build-profile.json")
+
+Timings from render worker processes are sent back with each post and
+merged with merge(). Categories nest (a post's markdown time includes its
+processors, which include highlighting) and fetch threads overlap, so
+totals are not meant to add up to the wall time.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+_active = None
+_NOT_TIMED = contextlib.nullcontext()
+
+
+class BuildProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        # category -> key -> [count, seconds, max seconds]
+        self.stats = {}
+
+    def record(self, category, key, seconds):
+        with self._lock:
+            entry = self.stats.setdefault(category, {}).setdefault(key, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def merge(self, stats):
+        with self._lock:
+            for category, items in stats.items():
+                for key, (count, seconds, longest) in items.items():
+                    entry = self.stats.setdefault(category, {}).setdefault(key, [0, 0.0, 0.0])
+                    entry[0] += count
+                    entry[1] += seconds
+                    entry[2] = max(entry[2], longest)
+
+    def drain(self):
+        """Return and clear the collected stats."""
+        with self._lock:
+            stats, self.stats = self.stats, {}
+        return stats
+
+    def report(self):
+        categories = {}
+        for category, items in sorted(self.stats.items()):
+            ordered = sorted(items.items(), key=lambda item: item[1][1], reverse=True)
+            categories[category] = {
+                "count": sum(count for count, _, _ in items.values()),
+                "seconds": round(sum(seconds for _, seconds, _ in items.values()), 6),
+                "items": {key: {"count": count, "seconds": round(seconds, 6), "max_seconds": round(longest, 6)}
+                          for key, (count, seconds, longest) in ordered},
+            }
+        return {"wall_seconds": round(time.perf_counter() - self.started, 6), "categories": categories}
+
+
+class _Timer:
+    __slots__ = ("profile", "category", "key", "start")
+
+    def __init__(self, profile, category, key):
+        self.profile = profile
+        self.category = category
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.record(self.category, self.key, time.perf_counter() - self.start)
+        return False
+
+
+def start():
+    """Start collecting timings in this process."""
+    global _active
+    _active = BuildProfile()
+    return _active
+
+def active():
+    return _active is not None
+
+def timed(category, key):
+    """Context manager timing a block under category/key; does nothing unless profiling."""
+    if _active is None:
+        return _NOT_TIMED
+    return _Timer(_active, category, key)
+
+def drain():
+    return _active.drain() if _active is not None else {}
+
+def merge(stats):
+    if _active is not None and stats:
+        _active.merge(stats)
+
+
+def instrument_markdown(md):
+    """Time every pre-, tree- and postprocessor registered on md, by class name.
+
+    Markdown's Registry has no public list of registration names, so
+    processors are labelled by their class.
+    """
+    for category, registry in (("preprocessor", md.preprocessors), ("treeprocessor", md.treeprocessors),
+                               ("postprocessor", md.postprocessors)):
+        for processor in registry:
+            processor.run = _timed_run(processor.run, category, type(processor).__name__)
+
+def _timed_run(run, category, name):
+    def timed_run(*args, **kwargs):
+        with timed(category, name):
+            return run(*args, **kwargs)
+    return timed_run
+
+
+def write_report(path, extra=None):
+    """Write the JSON report to path and print each category's total."""
+    report = _active.report()
+    if extra:
+        report.update(extra)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Build profile ({report['wall_seconds'] * 1000:.0f} ms wall) written to {path}")
+    for category, summary in report["categories"].items():
+        print(f"\t{category:<16}{summary['seconds'] * 1000:>10.1f} ms  ({summary['count']} timed)")
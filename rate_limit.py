@@ -0,0 +1,147 @@
+"""
+Rate-limit-aware request scheduler for the GitHub API.
+
+RequestScheduler wraps a requests.Session and exposes the same get()/post()
+calls, so the portfolio fetchers and HttpCache can use it like a session:
+
+- a token bucket spreads requests out (GitHub's secondary limits punish bursts)
+- a semaphore caps how many requests are in flight at once
+- X-RateLimit-Remaining/X-RateLimit-Reset and Retry-After pause every
+  thread until GitHub says requests are allowed again
+- 403/429 rate-limit responses, 5xx responses and connection errors are
+  retried with jittered exponential backoff
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+import profiling
+
+# Substring GitHub puts in the body of secondary rate limit 403s
+SECONDARY_LIMIT_MESSAGE = "secondary rate limit"
+
+
+class RequestScheduler:
+    def __init__(self, session, rate=10.0, burst=20, max_concurrency=8, max_retries=5,
+                 backoff_base=1.0, backoff_cap=60.0, secondary_wait=60.0, secondary_wait_cap=300.0, timeout=30):
+        self.session = session
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        # GitHub asks clients to wait at least a minute after an unexplained secondary limit
+        self.secondary_wait = secondary_wait
+        # Repeated secondary limits double the wait, up to this
+        self.secondary_wait_cap = secondary_wait_cap
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            with profiling.timed("rate limit", "wait for turn"):
+                self._wait_for_turn()
+            try:
+                with self._slots, profiling.timed("network", f"{method} {url}"):
+                    r = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"\t !  {type(e).__name__} for {url}, retrying in {delay:.1f}s")
+            else:
+                delay = self._retry_delay(r, attempt, will_retry=attempt < self.max_retries)
+                if delay is None or attempt >= self.max_retries:
+                    return r
+                print(f"\t !  {r.status_code} for {url}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def _wait_for_turn(self):
+        """Block until any global pause is over and a token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if wait <= 0:
+                    self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+                    self._refilled_at = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def _pause(self, seconds):
+        # Pause every thread, not just the one that hit the limit
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _backoff(self, attempt):
+        # "Full jitter": uniform over [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _retry_delay(self, r, attempt, will_retry=True):
+        """Seconds to wait before retrying r, or None if it shouldn't be retried.
+
+        Other threads are only paused for a rate limit when will_retry, i.e.
+        when this thread is going to wait and try again.
+        """
+        remaining = r.headers.get("X-RateLimit-Remaining")
+        retry_after = r.headers.get("Retry-After")
+
+        if remaining == "0" and r.status_code not in (403, 429):
+            # Last request of the window succeeded; hold everyone else until the reset
+            self._pause(self._until_reset(r))
+            return None
+
+        if r.status_code in (403, 429):
+            if retry_after is not None:
+                delay = self._retry_after_seconds(retry_after)
+            elif remaining == "0":
+                delay = self._until_reset(r)
+            elif r.status_code == 429 or SECONDARY_LIMIT_MESSAGE in r.text.lower():
+                delay = min(self.secondary_wait * 2 ** attempt, self.secondary_wait_cap)
+            else:
+                # A plain 403 (e.g. permissions) won't succeed on retry
+                return None
+            if will_retry:
+                self._pause(delay)
+            return delay + self._backoff(0)
+
+        if r.status_code >= 500:
+            return self._backoff(attempt)
+        return None
+
+    def _retry_after_seconds(self, value):
+        """Retry-After is either a number of seconds or an HTTP date (RFC 9110)."""
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return self.secondary_wait
+
+    def _until_reset(self, r):
+        try:
+            return max(0.0, float(r.headers["X-RateLimit-Reset"]) - time.time()) + 1
+        except (KeyError, ValueError):
+            return self.secondary_wait
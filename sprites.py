@@ -0,0 +1,147 @@
+"""
+Sprite atlases for the frame animations on the home page.
+
+index.html used to animate each astronaut by swapping its src through
+individual PNGs in Astronaut3D/tiny/, one request and one decode per
+frame. build_atlas() packs every frame sequence of an atlas into a single
+WebP image, one row per animation, and writes a JSON frame map next to it:
+
+    {
+      "image": "astronaut.webp",
+      "width": 1280, "height": 576,
+      "frame_width": 160, "frame_height": 192,
+      "source_hash": "...",
+      "animations": {
+        "spin0": {"frame_ms": 150, "frames": [{"x": 0, "y": 192}, ...]},
+        ...
+      }
+    }
+
+The page loads the map and the image once and moves background-position
+from frame to frame. Identical frames share a cell. The map stores a hash
+of the source frames and the atlas settings, so an atlas is only rebuilt
+when a frame or its definition changes (or with --force).
+
+    python build.py sprites [--force]
+
+Needs Pillow.
+"""
+
+import hashlib
+import io
+import json
+import os
+
+import output_writer
+import profiling
+
+# Frames the page plays: the still frame new astronauts start on, then the two spin cycles
+ATLASES = {
+    "astronaut": {
+        "out_dir": "./Astronaut3D/atlas",
+        "animations": {
+            "still": {"frames": ["Astronaut3D/tiny/0001.png"], "frame_ms": 0},
+            "spin0": {"frames": [f"Astronaut3D/tiny/{i:04d}.png" for i in range(5, 13)], "frame_ms": 150},
+            "spin1": {"frames": [f"Astronaut3D/tiny/{i:04d}.png" for i in range(14, 22)], "frame_ms": 150},
+        },
+    },
+}
+WEBP_OPTIONS = {"quality": 90, "method": 6}
+# Bump when the atlas layout or encoding changes, so existing atlases are rebuilt
+ATLAS_VERSION = 1
+
+
+def source_hash(definition, root="."):
+    """Hash of an atlas definition and the bytes of every frame in it."""
+    digest = hashlib.sha256(json.dumps([ATLAS_VERSION, WEBP_OPTIONS, definition["animations"]],
+                                       sort_keys=True).encode("utf-8"))
+    for animation in definition["animations"].values():
+        for frame in animation["frames"]:
+            with open(os.path.join(root, frame), 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+def is_up_to_date(map_path, image_path, digest):
+    try:
+        with open(map_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("source_hash") == digest and os.path.exists(image_path)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+
+def build_atlas(name, definition, root=".", force=False):
+    """Pack the animations of one atlas into out_dir/<name>.webp and out_dir/<name>.json."""
+    out_dir = os.path.normpath(os.path.join(root, definition["out_dir"]))
+    map_path = os.path.join(out_dir, f"{name}.json")
+    image_path = os.path.join(out_dir, f"{name}.webp")
+    digest = source_hash(definition, root)
+    if not force and is_up_to_date(map_path, image_path, digest):
+        print(f"{name} atlas up to date")
+        return False
+
+    try:
+        from PIL import Image
+    except ImportError:
+        raise SystemExit("Building sprite atlases needs Pillow (pip install pillow)")
+
+    animations = definition["animations"]
+    frames = {}
+    for animation in animations.values():
+        for frame in animation["frames"]:
+            if frame not in frames:
+                with profiling.timed("io", f"read {frame}"):
+                    frames[frame] = Image.open(os.path.join(root, frame)).convert("RGBA")
+    sizes = {image.size for image in frames.values()}
+    if len(sizes) != 1:
+        raise SystemExit(f"Frames of the {name} atlas differ in size: {sorted(sizes)}")
+    frame_width, frame_height = sizes.pop()
+
+    # One row per animation; a frame identical to one already placed reuses its cell
+    columns = max(len(animation["frames"]) for animation in animations.values())
+    cells = {}
+    placements = []
+    frame_map = {}
+    for row, (animation_name, animation) in enumerate(animations.items()):
+        entries = []
+        for column, frame in enumerate(animation["frames"]):
+            pixels = frames[frame].tobytes()
+            cell = cells.get(pixels)
+            if cell is None:
+                cell = cells[pixels] = (column * frame_width, row * frame_height)
+                placements.append((frames[frame], cell))
+            entries.append({"x": cell[0], "y": cell[1]})
+        frame_map[animation_name] = {"frame_ms": animation["frame_ms"], "frames": entries}
+
+    atlas = Image.new("RGBA", (columns * frame_width, len(animations) * frame_height), (0, 0, 0, 0))
+    for image, cell in placements:
+        atlas.paste(image, cell)
+    buffer = io.BytesIO()
+    with profiling.timed("sprites", f"encode {name}"):
+        atlas.save(buffer, "WEBP", **WEBP_OPTIONS)
+
+    os.makedirs(out_dir, exist_ok=True)
+    output_writer.write_bytes(image_path, buffer.getvalue())
+    output_writer.write_text(map_path, json.dumps({
+        "image": os.path.basename(image_path),
+        "width": atlas.width,
+        "height": atlas.height,
+        "frame_width": frame_width,
+        "frame_height": frame_height,
+        "source_hash": digest,
+        "animations": frame_map,
+    }, indent=2) + "\n")
+    source_bytes = sum(os.path.getsize(os.path.join(root, frame)) for frame in frames)
+    print(f"{name} atlas: {len(frames)} frames ({source_bytes / 1024:.0f} KB) -> {image_path} "
+          f"({len(buffer.getvalue()) / 1024:.0f} KB, {len(placements)} cells)")
+    return True
+
+def build_atlases(root=".", force=False):
+    for name, definition in ATLASES.items():
+        build_atlas(name, definition, root, force)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Pack animation frames into sprite atlases.")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the frames have not changed")
+    args = parser.parse_args()
+    build_atlases(force=args.force)
@@ -0,0 +1,85 @@
+"""
+A stand-in for api.github.com that serves the responses in tests/fixtures/github.
+
+rest.json lists GET responses by path (query string included); "{base}" in
+a header is replaced with the stub's own address, so Link pagination stays
+on the stub. graphql.json lists POST /graphql responses by the query's
+variables. Anything else is answered 404, and every request is counted.
+
+    with GitHubStub() as stub:
+        generateportfolio.GITHUB_API = stub.url
+        ...
+        stub.requests  # [(method, path), ...]
+"""
+
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "github")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class GitHubStub:
+    def __init__(self):
+        self.rest = {entry["path"]: entry for entry in load_fixture("rest.json")}
+        self.graphql = [(entry["variables"], entry["body"]) for entry in load_fixture("graphql.json")]
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _record(self, method, path):
+        with self._lock:
+            self.requests.append((method, path))
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, status, body, headers=None):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value.replace("{base}", stub.url))
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                stub._record("GET", self.path)
+                entry = stub.rest.get(self.path)
+                if entry is None:
+                    self.send(404, '{"message": "Not Found"}')
+                elif entry["headers"].get("ETag") and self.headers.get("If-None-Match") == entry["headers"]["ETag"]:
+                    self.send(304, "", {"ETag": entry["headers"]["ETag"]})
+                else:
+                    self.send(entry["status"], entry["body"], entry["headers"])
+
+            def do_POST(self):
+                stub._record("POST", self.path)
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                for variables, response in stub.graphql:
+                    if self.path == "/graphql" and body.get("variables") == variables:
+                        return self.send(200, json.dumps(response), {"Content-Type": "application/json"})
+                self.send(404, '{"message": "Not Found"}')
+
+        return Handler
@@ -0,0 +1,63 @@
+"""
+The combined-pattern AsaLexer engine against Pygments' RegexLexer engine,
+and the current rules against the original ones.
+
+Token streams are compared after merging adjacent tokens of the same
+type, which is all the HTML formatter sees (see benchmarks/asa_lexer.py).
+"""
+
+import os
+import random
+import re
+
+import pytest
+from pygments.token import Error
+
+from asa_lexer import AsaLexer
+from benchmarks.asa_lexer import (EXPECTED_DIFFERENCES, OriginalRulesAsaLexer, ReferenceAsaLexer, generate_corpus,
+                                  merged, random_soup)
+
+SEED = 20250406
+POSTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "b_md")
+ASA_BLOCK_RE = re.compile(r'```asa\n(.*?)```', re.DOTALL)
+
+
+def blog_asa_blocks():
+    blocks = []
+    for name in sorted(os.listdir(POSTS_DIR)):
+        if name.endswith(".md"):
+            with open(os.path.join(POSTS_DIR, name), 'r', encoding='utf-8') as f:
+                blocks.extend(ASA_BLOCK_RE.findall(f.read()))
+    return blocks
+
+def random_soups():
+    rng = random.Random(SEED)
+    return [random_soup(rng, rng.randint(0, 200)) for _ in range(1000)]
+
+def corpora():
+    rng = random.Random(SEED)
+    return [generate_corpus(size, rng) for size in (1024, 16 * 1024, 64 * 1024)]
+
+
+@pytest.mark.parametrize("engine, regex_lexer", [(OriginalRulesAsaLexer(), ReferenceAsaLexer()),
+                                                 (AsaLexer(), AsaLexer(fast=False))],
+                         ids=["original rules", "current rules"])
+def test_combined_pattern_engine_matches_regex_lexer(engine, regex_lexer):
+    for text in blog_asa_blocks() + random_soups() + corpora() + EXPECTED_DIFFERENCES:
+        assert merged(engine.get_tokens(text)) == merged(regex_lexer.get_tokens(text)), text[:200]
+
+
+def test_well_formed_code_lexes_as_it_did():
+    fast, reference = AsaLexer(), ReferenceAsaLexer()
+    for text in blog_asa_blocks() + corpora():
+        assert merged(fast.get_tokens(text)) == merged(reference.get_tokens(text)), text[:200]
+
+
+@pytest.mark.parametrize("text", EXPECTED_DIFFERENCES)
+def test_unterminated_literals_no_longer_lex_as_errors(text):
+    # The original rules gave up at the quote; the current ones keep it a literal to the end
+    current = merged(AsaLexer().get_tokens(text))
+    original = merged(ReferenceAsaLexer().get_tokens(text))
+    assert current != original
+    assert any(ttype is Error for ttype, _ in original)
+    assert not any(ttype is Error for ttype, _ in current)
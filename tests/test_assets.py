@@ -0,0 +1,41 @@
+import assets
+
+FINGERPRINTS = {"b/src": "b/src.0123456789", "samuelhp_files/styles.css": "samuelhp_files/styles.0123456789.css",
+                "images/it's.png": "images/it's.0123456789.png", "fonts/a b.ttf": "fonts/a b.0123456789.ttf",
+                "fonts/Jost.ttf": "fonts/Jost.0123456789.ttf"}
+
+
+def rewrite_html(html, page="b/index.html"):
+    return assets.rewrite_references(html, page, assets.HTML_REF_RE, FINGERPRINTS)
+
+def rewrite_css(css, page="samuelhp_files/styles.css"):
+    return assets.rewrite_references(css, page, assets.CSS_REF_RE, FINGERPRINTS)
+
+
+def test_only_the_reference_is_rewritten():
+    # The reference "src" also appears in the attribute name
+    assert rewrite_html('<img src="src">') == '<img src="src.0123456789">'
+    assert rewrite_html("<link href = '../samuelhp_files/styles.css?v=2#x'>") == \
+        "<link href = '../samuelhp_files/styles.0123456789.css?v=2#x'>"
+
+def test_values_may_contain_the_other_quote():
+    assert rewrite_html('''<img src="../images/it's.png">''') == '''<img src="../images/it's.0123456789.png">'''
+    assert assets.referenced_files('''<img src="../images/it's.png">''', "b/index.html", assets.HTML_REF_RE,
+                                   FINGERPRINTS) == {"images/it's.png"}
+
+def test_css_urls_keep_their_quoting():
+    assert rewrite_css("src: url(../fonts/Jost.ttf)") == "src: url(../fonts/Jost.0123456789.ttf)"
+    assert rewrite_css("src: url( '../fonts/a b.ttf' ) format('truetype')") == \
+        "src: url( '../fonts/a b.0123456789.ttf' ) format('truetype')"
+    assert rewrite_css('a { background: url("../images/it\'s.png") }') == \
+        'a { background: url("../images/it\'s.0123456789.png") }'
+    assert rewrite_css("a { background: url(../images/x.png) }") == "a { background: url(../images/x.png) }"
+
+
+def test_only_published_files_are_copied(tmp_path):
+    for path in ["index.html", "b/post.html", "thumbs/a-160.webp", "build.py", "requests.jsonl", "REVIEW_DIFF.patch",
+                 ".pytest_cache/v/cache/nodeids", ".venv/lib/site.py", "venv/pyvenv.cfg", "tests/fixtures/github/rest.json",
+                 "b/.DS_Store", "b/.cache/x", "b/post.html.123.tmp", "dist/index.html"]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("x", encoding="utf-8")
+    assert assets.site_files(str(tmp_path), str(tmp_path / "dist")) == ["b/post.html", "index.html", "thumbs/a-160.webp"]
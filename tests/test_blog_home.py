@@ -0,0 +1,79 @@
+import os
+import posixpath
+import re
+
+import generateblog
+
+
+def write_posts(tmp_path, names):
+    source = tmp_path / "b_md"
+    out = tmp_path / "b"
+    source.mkdir(exist_ok=True)
+    out.mkdir(exist_ok=True)
+    posts = {}
+    for name in names:
+        (source / f"{name}.md").write_text(f"# {name}\n", encoding="utf-8")
+        (out / f"{name}.html").write_text(f"post {name}", encoding="utf-8")
+        posts[f"{name}.md"] = {"output": f"{name}.html", "title": name, "thumb": "../images/x.png", "description": ""}
+    manifest = tmp_path / "manifest.json"
+    generateblog.save_manifest({"pipeline": {}, "posts": posts}, str(manifest))
+    return str(source), str(out) + "/", str(manifest)
+
+def build(tmp_path, names, page_size):
+    source, out, manifest = write_posts(tmp_path, names)
+    generateblog.generate_blog_home(source_path=source, out_path=out, manifest_path=manifest,
+                                    page_size=page_size, thumbnails=False)
+    return out
+
+
+def test_pages_do_not_overwrite_posts_named_like_them(tmp_path):
+    out = build(tmp_path, ["a", "page2", "page3"], page_size=1)
+    assert (tmp_path / "b" / "page2.html").read_text(encoding="utf-8") == "post page2"
+    assert (tmp_path / "b" / "page" / "2" / "index.html").is_file()
+    assert (tmp_path / "b" / "page" / "3" / "index.html").is_file()
+
+    # Fewer pages: only the stale page directory goes, the posts stay
+    build(tmp_path, ["a", "page2"], page_size=2)
+    assert not (tmp_path / "b" / "page" / "2").exists()
+    assert not (tmp_path / "b" / "page" / "3").exists()
+    assert sorted(os.listdir(out)) == ["a.html", "index.html", "page2.html", "page3.html"]
+
+
+def page_targets(out, page):
+    """Every link on a home page, resolved to a path under tmp_path."""
+    page_path = generateblog.blog_page_path(page)
+    with open(os.path.join(out, page_path), 'r', encoding='utf-8') as f:
+        urls = re.findall(r'(?:href|src)="([^"]+)"', f.read())
+    return {posixpath.normpath(posixpath.join("b", posixpath.dirname(page_path), url)) for url in urls}
+
+def test_links_on_later_pages_resolve_like_the_first(tmp_path):
+    out = build(tmp_path, ["a", "b", "c"], page_size=1)
+    shared = page_targets(out, 1) - {"b/a.html", "b/page/2/index.html"}
+    assert "samuelhp_files/styles.css" in shared and "images/x.png" in shared
+    for page, post in ((2, "b/b.html"), (3, "b/c.html")):
+        targets = page_targets(out, page)
+        assert shared <= targets
+        assert post in targets
+        assert all((tmp_path / target).is_file() for target in targets if target.startswith("b/"))
+
+
+def test_watch_builds_the_home_page_like_a_one_shot_build(monkeypatch):
+    import build
+    import devserver
+    import markdown_converter
+
+    homes = []
+    monkeypatch.setattr(markdown_converter, "get_converter", lambda: None)
+    monkeypatch.setattr(generateblog, "convert_pages_to_html", lambda *args, **kwargs: None)
+    monkeypatch.setattr(generateblog, "generate_blog_home", lambda *args, **kwargs: homes.append(kwargs))
+
+    class NoChanges:
+        def __init__(self, *args):
+            pass
+
+        def changes(self):
+            return iter(())
+
+    monkeypatch.setattr(devserver, "FileWatcher", NoChanges)
+    build.main(["blog", "--watch", "--page-size", "3", "--no-thumbnails", "--offline"])
+    assert homes == [{"page_size": 3, "thumbnails": False, "offline": True}]
@@ -0,0 +1,20 @@
+import markdown
+import pygments
+from markdown.extensions.codehilite import CodeHilite
+
+import highlight_cache
+
+
+def test_every_key_depends_on_the_pygments_and_markdown_versions(monkeypatch):
+    cache = highlight_cache.HighlightCache()
+    highlighters = [CodeHilite("print(1)", lang="python"), CodeHilite("let x = 1", lang="asa"),
+                    CodeHilite("#!/usr/bin/env python\nprint(1)")]
+    keys = [cache.key(highlighter, True) for highlighter in highlighters]
+
+    monkeypatch.setattr(pygments, "__version__", pygments.__version__ + ".post1")
+    after_pygments = [cache.key(highlighter, True) for highlighter in highlighters]
+    assert all(before != after for before, after in zip(keys, after_pygments))
+
+    monkeypatch.setattr(markdown, "__version__", markdown.__version__ + ".post1")
+    after_markdown = [cache.key(highlighter, True) for highlighter in highlighters]
+    assert all(before != after for before, after in zip(after_pygments, after_markdown))
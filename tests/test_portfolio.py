@@ -0,0 +1,71 @@
+"""
+The portfolio fetchers against a stand-in GitHub (see github_stub.py).
+"""
+
+import re
+
+import pytest
+
+import generateportfolio
+from github_stub import GitHubStub
+
+# Sorted by stars plus generate_portfolio()'s offsets; the fork, the hidden
+# repo and the repo without a description are left out
+EXPECTED_REPOS = ["Asa", "AetherGrid", "LMark", "DC-Client", "DC-Server", "vscode-asa"]
+EXPECTED_THUMBNAILS = [
+    "https://raw.githubusercontent.com/sam-astro/Asa/main/logo.png",
+    "https://raw.githubusercontent.com/sam-astro/AetherGrid/master/docs/screenshot.png",
+    "https://raw.githubusercontent.com/The-Distributed-Computing-Project/DC-Client/main/images/banner.png",
+    "https://example.com/icon.png",
+]
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    with GitHubStub() as stub:
+        monkeypatch.setattr(generateportfolio, "GITHUB_API", stub.url)
+        yield stub
+
+def build(tmp_path, backend, offline=False):
+    out_path = tmp_path / f"{backend}{'-offline' if offline else ''}.html"
+    generateportfolio.generate_portfolio("sam-astro", "test-token", out_path=str(out_path),
+                                         cache_dir=str(tmp_path / "http"), offline=offline, backend=backend,
+                                         thumbnails=False)
+    return out_path.read_bytes()
+
+
+def test_fetch_repositories_follows_pagination(stub):
+    session = generateportfolio.create_session()
+    listings = generateportfolio.fetch_repositories(["sam-astro", "Asa-Programming-Language"], None, session)
+    assert [listing["username"] for listing in listings] == ["sam-astro", "Asa-Programming-Language"]
+    assert [repo["name"] for repo in listings[0]["repos"]] == \
+        ["AetherGrid", "Asa", "dotfiles", "LMark", "pygments", "RedditMaker"]
+    assert ("GET", "/users/sam-astro/repos?per_page=100&page=2") in stub.requests
+
+def test_readme_image_urls(stub):
+    session = generateportfolio.create_session()
+    repos = [{"username": "sam-astro", "name": "AetherGrid", "default_branch": "master"},
+             {"username": "sam-astro", "name": "LMark"},
+             {"username": "sam-astro", "name": "dotfiles"}]
+    assert generateportfolio.fetch_readme_image_urls(repos, None, session) == \
+        ["https://raw.githubusercontent.com/sam-astro/AetherGrid/master/docs/screenshot.png", None, None]
+
+def test_rest_and_graphql_portfolios_are_identical(stub, tmp_path):
+    rest = build(tmp_path, "rest")
+    graphql = build(tmp_path, "graphql")
+    assert rest == graphql
+
+    html = rest.decode("utf-8")
+    assert re.findall(r'<div class="portfolio-title">(.*?)</div>', html) == EXPECTED_REPOS
+    assert re.findall(r'<img src="(.*?)"', html) == EXPECTED_THUMBNAILS
+    # One batched query per page of the longest listing, instead of a request per page and README
+    assert [request for request in stub.requests if request[0] == "POST"] == [("POST", "/graphql")] * 2
+
+def test_offline_builds_match_online(stub, tmp_path):
+    online = build(tmp_path, "rest")
+    build(tmp_path, "graphql")
+    requests_made = len(stub.requests)
+
+    assert build(tmp_path, "rest", offline=True) == online
+    assert build(tmp_path, "graphql", offline=True) == online
+    assert len(stub.requests) == requests_made
@@ -0,0 +1,67 @@
+import post_metadata
+from markdown_converter import convert_with_metadata
+
+POST = """<title>Testing</title>
+
+# First heading
+
+The first paragraph.
+
+## Second heading
+
+The second paragraph.
+"""
+
+
+def test_description_is_extracted_once_from_the_whole_document(monkeypatch):
+    calls = []
+    extract = post_metadata.extract_description
+    monkeypatch.setattr(post_metadata, "extract_description", lambda text, **kwargs: calls.append(text) or extract(text, **kwargs))
+    html, metadata = convert_with_metadata(POST)
+    assert calls == [html]
+    assert metadata["title"] == "Testing"
+    assert metadata["description"] == "The first paragraph.\nThe second paragraph."
+
+
+def page(body):
+    return f'<html><body><div class="blog-body">{body}</div>\n</body></html>'
+
+def feed_in_chunks(html, size, max_chars=500):
+    extractor = post_metadata.DescriptionExtractor(max_chars)
+    for start in range(0, len(html), size):
+        if extractor.feed(html[start:start + size]):
+            break
+    return extractor.close()
+
+def test_chunked_extraction_matches_whole_page():
+    import random
+    rng = random.Random(0)
+    parts = ["<p>plain text</p>", "<p>a <b>bold</b> &amp; <i>x</i></p>", "<div><p>nested</p></div>",
+             "<p><img src='x.png'></p>", "<pre><code>&lt;p&gt;code&lt;/p&gt;</code></pre>", "\n", "<hr>",
+             "<p>" + "long " * 50 + "</p>", "<ul><li>item</li></ul>"]
+    for _ in range(200):
+        html = page("".join(rng.choice(parts) for _ in range(rng.randint(0, 12))))
+        # Without </body> there is no description, even once max_chars have been seen
+        unterminated = html[:-len("</body></html>")]
+        for max_chars in (20, 500):
+            expected = post_metadata.extract_description_from_html(html, max_chars)
+            for size in (1, 2, 3, 7, 64):
+                assert feed_in_chunks(html, size, max_chars) == expected, (html, size, max_chars)
+                assert feed_in_chunks(unterminated, size, max_chars) == "", (unterminated, size, max_chars)
+
+def test_long_paragraph_is_not_copied_per_chunk():
+    extractor = post_metadata.DescriptionExtractor(10 ** 9)
+    extractor.feed(page("<p>")[:-len("</div>\n</body></html>")])
+    held = len(extractor.buffer)
+    for _ in range(1000):
+        extractor.feed("word " * 200)
+    assert len(extractor.buffer) == held
+    extractor.feed("end</p></div></body>")
+    assert extractor.close() == ("word " * 200 * 1000 + "end").strip()
+
+def test_description_from_file_takes_path_strings(tmp_path):
+    path = tmp_path / "post.html"
+    path.write_text(page("<p>From a file.</p>"), encoding="utf-8")
+    assert post_metadata.extract_description_from_file(str(path)) == "From a file."
+    assert post_metadata.extract_description_from_file(path) == "From a file."
+    assert post_metadata.extract_description_from_html(str(path)) == ""
@@ -0,0 +1,31 @@
+import time
+from email.utils import formatdate
+
+from rate_limit import RequestScheduler
+
+
+class Response:
+    def __init__(self, status_code, headers=None, text=""):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = text
+
+
+def test_retry_after_seconds_and_http_date():
+    scheduler = RequestScheduler(None)
+    assert scheduler._retry_delay(Response(429, {"Retry-After": "5"}), 0) >= 5
+    delay = scheduler._retry_delay(Response(429, {"Retry-After": formatdate(time.time() + 30, usegmt=True)}), 0)
+    assert 25 <= delay <= 32
+
+def test_secondary_limit_wait_is_capped():
+    scheduler = RequestScheduler(None, backoff_base=0)
+    secondary = Response(403, text="You have exceeded a secondary rate limit")
+    assert scheduler._retry_delay(secondary, 0) == scheduler.secondary_wait
+    assert scheduler._retry_delay(secondary, scheduler.max_retries) == scheduler.secondary_wait_cap
+
+def test_final_attempt_does_not_pause_other_threads():
+    scheduler = RequestScheduler(None)
+    scheduler._retry_delay(Response(429, {"Retry-After": "120"}), scheduler.max_retries, will_retry=False)
+    assert scheduler._paused_until == 0.0
+    scheduler._retry_delay(Response(429, {"Retry-After": "120"}), 0)
+    assert scheduler._paused_until > time.monotonic() + 100
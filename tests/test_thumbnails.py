@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("PIL")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Prints whether making the card for images/profile.png loaded Pillow's Image module
+CARD = """
+import sys
+import thumbnails
+thumbs = thumbnails.get_thumbnail_cache(out_dir=sys.argv[1], cache_dir=sys.argv[2], offline=True)
+variants = thumbs.variants("images/profile.png", base_dir=sys.argv[3])
+thumbs.save()
+print(bool(variants), "PIL.Image" in sys.modules)
+"""
+
+
+def card(tmp_path):
+    result = subprocess.run([sys.executable, "-c", CARD, str(tmp_path / "thumbs"), str(tmp_path / "cache"), REPO_ROOT],
+                            cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.split()[-2:]
+
+
+def test_pillow_is_only_loaded_when_a_variant_is_missing(tmp_path):
+    assert card(tmp_path) == ["True", "True"]
+    assert card(tmp_path) == ["True", "False"]
+
+    # A deleted variant is made again
+    os.remove(tmp_path / "thumbs" / sorted(os.listdir(tmp_path / "thumbs"))[0])
+    assert card(tmp_path) == ["True", "True"]
+
+
+def test_offline_cache_does_not_fetch_remote_images(tmp_path):
+    import thumbnails
+
+    class NoNetwork:
+        def get(self, *args, **kwargs):
+            raise AssertionError("fetched while offline")
+
+    thumbs = thumbnails.ThumbnailCache(out_dir=str(tmp_path / "thumbs"), cache_dir=str(tmp_path / "cache"),
+                                       session=NoNetwork(), offline=True)
+    assert thumbs.variants("https://example.com/image.png") is None
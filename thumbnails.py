@@ -0,0 +1,293 @@
+"""
+Responsive thumbnails for the blog and portfolio cards.
+
+Cards used to show each post's or repository's first image at full size,
+so an index page downloaded multi-megabyte originals to draw small
+thumbnails. ThumbnailCache reads or fetches each source once and writes
+resized WebP (and AVIF, when Pillow supports it) variants at a few widths
+into THUMBNAIL_DIR. That directory is build output and is not committed:
+the blog and portfolio builds write it, and the assets stage publishes it
+with the pages that link to it:
+
+    thumbs = ThumbnailCache()
+    html = thumbs.img_html("../images/profile.png", "Profile", sizes="10vw",
+                           base_dir="./b", url_prefix="../thumbs")
+    thumbs.save()
+
+Variants are content-addressed (thumbs/<hash>-<width>.webp), so an image
+that has already been processed is never processed again, whichever page
+or URL it comes from. .cache/thumbnails keeps the index of processed
+images, the originals of remote images and the hash of every source,
+keyed by path, size and mtime for local files and by URL for remote
+ones. Remote sources are revalidated with a conditional request at most
+once per SOURCE_MAX_AGE seconds, and a failed fetch is not retried
+sooner either.
+
+Pillow is optional: without it, or for images it cannot resize (SVG,
+animations), the cards fall back to a plain <img> of the original. Its
+Image module is only loaded when a variant is missing, and the formats
+it can write are remembered in the index per Pillow version, so a build
+whose thumbnails are all up to date never loads it.
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+import output_writer
+import profiling
+
+THUMBNAIL_DIR = "./thumbs"
+THUMBNAIL_CACHE_DIR = "./.cache/thumbnails"
+THUMBNAIL_WIDTHS = (160, 320, 640)
+SOURCE_MAX_AGE = 24 * 60 * 60
+FORMAT_OPTIONS = {
+    "avif": {"quality": 50},
+    "webp": {"quality": 80, "method": 6},
+}
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+
+
+def get_image_module():
+    """Pillow's Image module, or None if Pillow is not installed."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+def pillow_version():
+    """Pillow's version, or None if it is not installed, without loading the Image module."""
+    try:
+        import PIL
+    except ImportError:
+        return None
+    return PIL.__version__
+
+def available_formats():
+    """Variant formats this Pillow can write, best first."""
+    from PIL import features
+    return [name for name in ("avif", "webp") if features.check(name)]
+
+
+class ThumbnailCache:
+    def __init__(self, out_dir=THUMBNAIL_DIR, cache_dir=THUMBNAIL_CACHE_DIR, widths=THUMBNAIL_WIDTHS,
+                 session=None, offline=False):
+        self.out_dir = out_dir
+        self.cache_dir = cache_dir
+        self.widths = tuple(sorted(widths))
+        self.session = session
+        self.offline = offline
+        self._formats = None
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(cache_dir, "index.json")
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.index = {"sources": {}, "images": {}}
+        self._changed = False
+
+    @property
+    def formats(self):
+        """Variant formats, best first; only asks Pillow when the index has none for its version."""
+        if self._formats is None:
+            version = pillow_version()
+            known = self.index.get("formats")
+            if version is None:
+                self._formats = []
+            elif known and known["pillow"] == version:
+                self._formats = known["formats"]
+            else:
+                self._formats = available_formats()
+                with self._lock:
+                    self.index["formats"] = {"pillow": version, "formats": self._formats}
+                    self._changed = True
+        return self._formats
+
+    def save(self):
+        if not self._changed:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        with self._lock, open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._index_path)
+        self._changed = False
+
+    def _set(self, table, key, value):
+        with self._lock:
+            self.index[table][key] = value
+            self._changed = True
+
+    def _original_path(self, digest):
+        return os.path.join(self.cache_dir, "originals", digest)
+
+    def _store_original(self, digest, data):
+        path = self._original_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+    def _local_source(self, path, refresh=False):
+        """(hash, bytes or None) for a local file; bytes are only read when the hash is not known."""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        known = self.index["sources"].get(key)
+        if not refresh and known and known.get("size") == stat.st_size and known.get("mtime_ns") == stat.st_mtime_ns:
+            return known["hash"], None
+        with profiling.timed("io", f"read {os.path.basename(path)}"), open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        self._set("sources", key, {"hash": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+        return digest, data
+
+    def _remote_source(self, url, refresh=False):
+        """(hash, bytes or None) for a URL, fetching it only when it is new or due for revalidation."""
+        known = None if refresh else self.index["sources"].get(url)
+        if known and (self.offline or time.time() - known["checked"] < SOURCE_MAX_AGE):
+            return known["hash"], None
+        if self.offline:
+            return None, None
+        headers = {}
+        if known and known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known and known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+        session = self.session
+        if session is None:
+            import requests
+            session = requests
+        try:
+            with profiling.timed("network", f"GET {url}"):
+                response = session.get(url, headers=headers, timeout=30)
+        except Exception as e:
+            return self._fetch_failed(url, known, e)
+        if response.status_code == 304 and known:
+            self._set("sources", url, dict(known, checked=time.time()))
+            return known["hash"], None
+        if response.status_code != 200:
+            return self._fetch_failed(url, known, f"status {response.status_code}")
+        data = response.content
+        digest = hashlib.sha256(data).hexdigest()
+        self._store_original(digest, data)
+        self._set("sources", url, {"hash": digest, "checked": time.time(), "etag": response.headers.get("ETag"),
+                                   "last_modified": response.headers.get("Last-Modified")})
+        return digest, data
+
+    def _fetch_failed(self, url, known, error):
+        """Keep using the last good copy, if any, and do not retry until the source is due again."""
+        print(f"\t ! Could not fetch thumbnail {url} ({error})")
+        self._set("sources", url, dict(known or {"hash": None}, checked=time.time()))
+        return (known["hash"] if known else None), None
+
+    def _source(self, src, base_dir, site_root, refresh=False):
+        if src.startswith(("http://", "https://")):
+            return self._remote_source(src, refresh)
+        path = src.split("?", 1)[0].split("#", 1)[0]
+        path = os.path.join(site_root, path.lstrip("/")) if path.startswith("/") else os.path.join(base_dir, path)
+        return self._local_source(path, refresh)
+
+    def _variant_name(self, digest, width, image_format):
+        return f"{digest[:16]}-{width}.{image_format}"
+
+    def _is_complete(self, digest):
+        entry = self.index["images"].get(digest)
+        if entry is None:
+            return False
+        if not entry["widths"]:
+            # Not resizable; remembered so it is not decoded again
+            return True
+        return set(self.formats) <= set(entry["formats"]) and all(
+            os.path.exists(os.path.join(self.out_dir, self._variant_name(digest, width, image_format)))
+            for width in entry["widths"] for image_format in self.formats)
+
+    def _make_variants(self, digest, data):
+        Image = get_image_module()
+        from PIL import ImageOps
+        try:
+            image = Image.open(io.BytesIO(data))
+            if getattr(image, "is_animated", False):
+                raise ValueError("animated image")
+            image = ImageOps.exif_transpose(image)
+            image.load()
+        except Exception as e:
+            print(f"\t ! Not making thumbnails for an image ({e})")
+            self._set("images", digest, {"widths": [], "formats": []})
+            return
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or "A" in image.mode else "RGB")
+        # Never upscale: widths wider than the original collapse into the original width
+        widths = sorted({min(width, image.width) for width in self.widths})
+        os.makedirs(self.out_dir, exist_ok=True)
+        for width in widths:
+            height = max(1, round(image.height * width / image.width))
+            with profiling.timed("thumbnail", f"resize {width}"):
+                resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for image_format in self.formats:
+                buffer = io.BytesIO()
+                with profiling.timed("thumbnail", f"encode {image_format}"):
+                    resized.save(buffer, image_format.upper(), **FORMAT_OPTIONS[image_format])
+                output_writer.write_bytes(os.path.join(self.out_dir, self._variant_name(digest, width, image_format)),
+                                          buffer.getvalue())
+        self._set("images", digest, {"widths": widths, "formats": list(self.formats)})
+
+    def variants(self, src, base_dir=".", site_root="."):
+        """Return {format: [(file name, width), ...]} for the image at src, or None to use src as is.
+
+        Relative paths are resolved against base_dir (the directory of the
+        page that shows the image), and paths starting with / against site_root.
+        """
+        if not self.formats or not src or src.startswith("data:"):
+            return None
+        try:
+            digest, data = self._source(src, base_dir, site_root)
+            if digest is not None and data is None and not self._is_complete(digest):
+                try:
+                    with open(self._original_path(digest), 'rb') as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    # Only the hash was kept; read or fetch the source again
+                    digest, data = self._source(src, base_dir, site_root, refresh=True)
+        except OSError as e:
+            print(f"\t ! Could not read thumbnail {src}: {e}")
+            return None
+        if digest is None:
+            return None
+        if not self._is_complete(digest):
+            with profiling.timed("thumbnail", "process"):
+                self._make_variants(digest, data)
+        entry = self.index["images"][digest]
+        if not entry["widths"]:
+            return None
+        return {image_format: [(self._variant_name(digest, width, image_format), width) for width in entry["widths"]]
+                for image_format in self.formats}
+
+    def img_html(self, src, alt, sizes, base_dir=".", site_root=".", url_prefix="thumbs"):
+        """A <picture> with srcset/sizes for the variants of src, or a plain <img> when there are none."""
+        variants = self.variants(src, base_dir, site_root)
+        return picture_html(src, alt, variants, sizes, url_prefix)
+
+
+def get_thumbnail_cache(**options):
+    """ThumbnailCache(**options), or None if Pillow is not installed."""
+    if pillow_version() is None:
+        print("\t ! Pillow is not installed, cards show the original images (pip install pillow)")
+        return None
+    return ThumbnailCache(**options)
+
+def picture_html(src, alt, variants, sizes, url_prefix):
+    img = f'<img src="{src}" alt="{alt}" loading="lazy"/>'
+    if not variants:
+        return img
+    sources = "".join(
+        f'<source type="{MIME_TYPES[image_format]}" sizes="{sizes}" srcset="'
+        + ", ".join(f"{url_prefix}/{name} {width}w" for name, width in files) + '"/>'
+        for image_format, files in variants.items())
+    return f"<picture>{sources}{img}</picture>"